@@ -0,0 +1,109 @@
+"""Batched deletion of ad messages posted by other bots.
+
+Spam bots post in bursts, so instead of one deleteMessage call per ad the
+messages are queued per chat and deleted together with deleteMessages (up
+to 100 per call) shortly after the first one arrives. Chats where the bot
+is not allowed to delete messages are remembered for a while, so their ads
+are not sent to Telegram just to fail again.
+"""
+
+import asyncio
+import logging
+import time
+
+from telegram.error import BadRequest, Forbidden
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds ads are collected before they are deleted together
+FLUSH_DELAY = 0.5
+# deleteMessages takes at most this many message ids
+MAX_BATCH = 100
+# Seconds before trying again in a chat where the bot could not delete messages
+NO_PERMISSION_RETRY = 600.0
+
+AD_DELETIONS = registry.counter(
+    'bot_ad_deletions_total', "Ad messages by deletion outcome", ['result'])
+
+
+class DeletionQueue:
+    def __init__(self, flush_delay=FLUSH_DELAY, max_batch=MAX_BATCH, no_permission_retry=NO_PERMISSION_RETRY):
+        self.flush_delay = flush_delay
+        self.max_batch = max_batch
+        self.no_permission_retry = no_permission_retry
+        # chat_id -> message ids waiting to be deleted
+        self._pending = {}
+        # chat_id -> time.monotonic() until which the bot is known not to be allowed to delete
+        self._no_permission = {}
+        self._tasks = set()
+        self.deleted = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def add(self, bot, chat_id, message_id):
+        """Queue message_id for deletion; returns False if the bot can't delete messages in chat_id"""
+        blocked_until = self._no_permission.get(chat_id)
+        if blocked_until is not None:
+            if time.monotonic() < blocked_until:
+                self.skipped += 1
+                AD_DELETIONS.inc('skipped')
+                return False
+            del self._no_permission[chat_id]
+
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = []
+            self._start(self._flush_later(bot, chat_id))
+        pending.append(message_id)
+        if len(pending) >= self.max_batch:
+            # Full batch, don't wait for the timer (which then sends whatever comes next early)
+            del self._pending[chat_id]
+            self._start(self._delete(bot, chat_id, pending))
+        return True
+
+    def permission_changed(self, chat_id, can_delete):
+        """The bot was promoted or demoted in chat_id (from a my_chat_member update)"""
+        if can_delete:
+            self._no_permission.pop(chat_id, None)
+        else:
+            self._no_permission[chat_id] = time.monotonic() + self.no_permission_retry
+
+    def _start(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, bot, chat_id):
+        await asyncio.sleep(self.flush_delay)
+        await self._flush(bot, chat_id)
+
+    async def _flush(self, bot, chat_id):
+        message_ids = self._pending.pop(chat_id, None)
+        if message_ids:
+            await self._delete(bot, chat_id, message_ids)
+
+    async def _delete(self, bot, chat_id, message_ids):
+        try:
+            await bot.delete_messages(chat_id, message_ids)
+        except (BadRequest, Forbidden) as e:
+            # Not an admin, no delete right, or removed from the chat
+            self.failed += len(message_ids)
+            AD_DELETIONS.inc('failed', amount=len(message_ids))
+            self._no_permission[chat_id] = time.monotonic() + self.no_permission_retry
+            logger.error(f"Can't delete ad messages in chat {chat_id}, skipping it for a while: {e}")
+        except Exception as e:
+            self.failed += len(message_ids)
+            AD_DELETIONS.inc('failed', amount=len(message_ids))
+            logger.error(f"Error deleting {len(message_ids)} ad messages in chat {chat_id}: {e}")
+        else:
+            # Messages that were already gone are skipped by Telegram, not reported
+            self.deleted += len(message_ids)
+            AD_DELETIONS.inc('deleted', amount=len(message_ids))
+            logger.info(f"Deleted {len(message_ids)} ad messages in chat {chat_id}")
+
+    async def close(self):
+        """Delete what is still queued (call on shutdown)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,60 @@
+"""In-memory cache of group administrators for permission checks.
+
+/ad, /checkall and any other admin-only feature ask AdminCache instead of
+calling get_chat_member every time. A chat's administrator list is fetched
+with one get_chat_administrators call and kept for `ttl` seconds; chat
+member updates (see member_updated) keep it current in between.
+"""
+
+import asyncio
+import time
+
+# Seconds a chat's administrator list is trusted without chat member updates
+ADMIN_CACHE_TTL = 300.0
+
+ADMIN_STATUSES = ('creator', 'administrator')
+
+
+class AdminCache:
+    def __init__(self, ttl=ADMIN_CACHE_TTL):
+        self.ttl = ttl
+        # chat_id -> (fetched_at, set of admin user ids)
+        self._admins = {}
+        # chat_id -> task fetching its administrators, so concurrent checks share one call
+        self._fetching = {}
+
+    async def is_admin(self, bot, chat_id, user_id):
+        """True if user_id is the creator or an administrator of chat_id"""
+        return user_id in await self.get_admins(bot, chat_id)
+
+    async def get_admins(self, bot, chat_id):
+        """User ids of chat_id's creator and administrators"""
+        cached = self._admins.get(chat_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        task = self._fetching.get(chat_id)
+        if task is None:
+            task = self._fetching[chat_id] = asyncio.ensure_future(self._fetch(bot, chat_id))
+            task.add_done_callback(lambda _: self._fetching.pop(chat_id, None))
+        # A caller giving up must not cancel the fetch the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot, chat_id):
+        administrators = await bot.get_chat_administrators(chat_id)
+        admins = {member.user.id for member in administrators if member.status in ADMIN_STATUSES}
+        self._admins[chat_id] = (time.monotonic(), admins)
+        return admins
+
+    def member_updated(self, chat_member_updated):
+        """Apply a ChatMemberUpdated (promotion, demotion, leaving...) to the cached list"""
+        cached = self._admins.get(chat_member_updated.chat.id)
+        if cached is None:
+            return
+        user_id = chat_member_updated.new_chat_member.user.id
+        if chat_member_updated.new_chat_member.status in ADMIN_STATUSES:
+            cached[1].add(user_id)
+        else:
+            cached[1].discard(user_id)
+
+    def invalidate(self, chat_id):
+        self._admins.pop(chat_id, None)
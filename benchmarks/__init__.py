@@ -0,0 +1,7 @@
+"""Offline benchmarks for the bot handlers.
+
+Drives the real handlers from bot.py with fake updates and a recording
+stub bot, so no token or network is needed. Run with:
+
+    python -m benchmarks
+"""
@@ -0,0 +1,163 @@
+"""Benchmark handle_message, button_callback and checkall_command offline.
+
+    python -m benchmarks                      # default corpus
+    python -m benchmarks --save before.json   # keep the numbers
+    python -m benchmarks --compare before.json
+    python -m benchmarks --metrics stages.prom # per-stage metrics of the run
+
+The bot runs against a temporary copy of filters.json, so the real file
+is never touched.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus, fakes
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(name, latencies, wall_time, api_calls):
+    latencies = sorted(latencies)
+    return {
+        'handler': name,
+        'updates': len(latencies),
+        'throughput': len(latencies) / wall_time if wall_time else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'api_calls': api_calls,
+    }
+
+
+async def run_handler(name, handler, updates, context, outbound):
+    """Run handler over every update in order, timing each call until its replies are sent"""
+    latencies = []
+    calls_before = len(context.bot.calls)
+    started = time.perf_counter()
+    for update in updates:
+        begin = time.perf_counter()
+        await handler(update, context)
+        await outbound.flush()
+        latencies.append(time.perf_counter() - begin)
+    wall_time = time.perf_counter() - started
+    return summarize(name, latencies, wall_time, len(context.bot.calls) - calls_before)
+
+
+async def run_benchmarks(bot, args):
+    stub = fakes.RecordingBot()
+    context = fakes.FakeContext(stub)
+    # The stub never rate limits, so neither does the scheduler; this measures its overhead
+    bot.outbound = bot.OutboundScheduler(global_rate=None, group_rate=None, private_rate=None)
+    outbound = bot.outbound
+    filters = bot.load_filters()
+
+    messages = corpus.generate_messages(filters, count=args.messages, seed=args.seed)
+    message_updates = [
+        fakes.message_update(stub, text, chat_id=-1000 - i % 50, message_id=i)
+        for i, (kind, text) in enumerate(messages)
+    ]
+    callbacks = corpus.generate_callbacks(filters, count=args.callbacks, seed=args.seed)
+    callback_updates = [fakes.callback_update(stub, data, text) for data, text in callbacks]
+    checkall_updates = [fakes.message_update(stub, "/checkall") for _ in range(args.checkall)]
+
+    # Warm up caches and compiled matchers so the first timed call is not an outlier
+    for update in message_updates[:50]:
+        await bot.handle_message(update, context)
+    await outbound.flush()
+
+    results = [
+        await run_handler('handle_message', bot.handle_message, message_updates, context, outbound),
+        await run_handler('button_callback', bot.button_callback, callback_updates, context, outbound),
+        await run_handler('checkall_command', bot.checkall_command, checkall_updates, context, outbound),
+    ]
+
+    # Per-kind breakdown of handle_message, to see which part of the corpus is slow
+    by_kind = {}
+    for (kind, text), update in zip(messages, message_updates):
+        by_kind.setdefault(kind, []).append(update)
+    for kind, updates in sorted(by_kind.items()):
+        results.append(await run_handler(f"handle_message[{kind}]", bot.handle_message, updates, context, outbound))
+    return results
+
+
+def print_results(results, baseline=None):
+    baseline = {row['handler']: row for row in baseline or []}
+    header = f"{'handler':<32}{'updates':>8}{'upd/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'calls':>8}"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        line = (f"{row['handler']:<32}{row['updates']:>8}{row['throughput']:>12.0f}"
+                f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}{row['api_calls']:>8}")
+        before = baseline.get(row['handler'])
+        if before and before['p99_ms']:
+            line += f"   p99 {row['p99_ms'] / before['p99_ms']:.2f}x vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot handlers without a bot token")
+    parser.add_argument('--messages', type=int, default=5000, help="number of text messages")
+    parser.add_argument('--callbacks', type=int, default=1000, help="number of button presses")
+    parser.add_argument('--checkall', type=int, default=50, help="number of /checkall commands")
+    parser.add_argument('--seed', type=int, default=1234, help="corpus seed")
+    parser.add_argument('--filters', default=os.path.join(REPO_DIR, 'filters.json'), help="filters file to copy")
+    parser.add_argument('--save', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="compare against results saved with --save")
+    parser.add_argument('--metrics', help="dump the bot's metrics (Prometheus text) to this file")
+    parser.add_argument('--with-logging', action='store_true', help="keep the bot's INFO logging (to /dev/null)")
+    args = parser.parse_args()
+
+    # bot.py reads these at import time
+    os.environ.setdefault('ADMIN_USER_ID', '1')
+    os.environ.setdefault('BOT_TOKEN', '0:benchmark')
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    metrics_path = os.path.abspath(args.metrics) if args.metrics else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if os.path.exists(args.filters):
+            shutil.copy(args.filters, os.path.join(workdir, 'filters.json'))
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_DIR)
+        import bot
+
+        if args.with_logging:
+            for handler in logging.getLogger().handlers:
+                handler.setStream(open(os.devnull, 'w'))
+        else:
+            logging.disable(logging.INFO)
+
+        with bot.catalog.batch():
+            bot.init_filters()
+            bot.create_all_filters()
+
+        results = asyncio.run(run_benchmarks(bot, args))
+        if metrics_path:
+            bot.registry.dump(metrics_path)
+
+    baseline = None
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
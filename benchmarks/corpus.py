@@ -0,0 +1,88 @@
+"""Synthetic group chatter for the benchmarks.
+
+The corpus is generated from the live filter catalog with a fixed seed,
+so two runs against the same catalog see exactly the same messages.
+"""
+
+import random
+
+CHATTER = [
+    "hi everyone", "good morning guys", "kya haal hai bhai", "koi hai?", "bhai link de do",
+    "yaar koi accha anime batao", "new episode kab aayega", "thanks bro", "ok", "lol",
+    "mujhe bhi chahiye", "kal dekha tha maine", "who is online", "sab log kaha ho",
+    "bro kuch naya hai kya", "admin please help", "gn everyone", "same here",
+    "ye wala best hai", "arre yaar", "what is the best anime of this season",
+]
+
+EMOJI = ["😂", "🔥", "❤️", "🙏", "😍", "👍", "🥺", "😭", "✨", "💯"]
+
+REQUEST_TEMPLATES = [
+    "{title}", "i want {title}", "give me {title} link", "{title} channel please",
+    "bhai {title} ka link do", "koi {title} dekh raha hai?", "{title} hindi me hai kya",
+    "where is {title}", "link for {title} {emoji}", "{title} {emoji}{emoji}",
+]
+
+
+def _typo(rng, title):
+    """Drop, double or swap one letter, like a hurried user would"""
+    if len(title) < 5:
+        return title
+    i = rng.randrange(1, len(title) - 1)
+    return rng.choice([
+        title[:i] + title[i + 1:],
+        title[:i] + title[i] + title[i:],
+        title[:i - 1] + title[i] + title[i - 1] + title[i + 1:],
+    ])
+
+
+def generate_messages(filters, count=5000, seed=1234):
+    """Return a list of (kind, text) pairs mixing hits, misses, long messages and emoji"""
+    rng = random.Random(seed)
+    names = sorted(filters)
+    aliases = sorted({alias for data in filters.values() for alias in data.get('aliases') or ()})
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            kind, text = 'exact', rng.choice(names)
+        elif roll < 0.35:
+            title = rng.choice(names)
+            kind = 'request'
+            text = rng.choice(REQUEST_TEMPLATES).format(title=title, emoji=rng.choice(EMOJI))
+        elif roll < 0.45 and aliases:
+            kind = 'keyword'
+            text = f"{rng.choice(CHATTER)} {rng.choice(aliases)} {rng.choice(EMOJI)}"
+        elif roll < 0.55:
+            kind, text = 'typo', _typo(rng, rng.choice(names))
+        elif roll < 0.65:
+            kind = 'long'
+            words = [rng.choice(CHATTER) for _ in range(rng.randint(15, 60))]
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(names))
+            text = ' '.join(words)
+        else:
+            kind = 'miss'
+            text = rng.choice(CHATTER)
+            if rng.random() < 0.5:
+                text += ' ' + ''.join(rng.choice(EMOJI) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.3:
+            text = text.title() if rng.random() < 0.5 else text.upper()
+        messages.append((kind, text))
+    return messages
+
+
+def generate_callbacks(filters, count=1000, seed=1234):
+    """Return a list of (callback_data, message_text) pairs like real button presses"""
+    rng = random.Random(seed)
+    names = [name for name, data in sorted(filters.items()) if data.get('button_links')]
+    menus = ["show_anime_list", "show_anime_movie_list", "show_popular", "show_help", "back_to_menu", "browse_0", "browse_1"]
+    callbacks = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            callbacks.append((rng.choice(menus), ''))
+        elif roll < 0.8 and names:
+            callbacks.append((f"filter_{filters[rng.choice(names)]['short_id']}", ''))
+        else:
+            callbacks.append((f"option_{rng.randrange(6)}", rng.choice(["Options for 'channels':", "Naruto Shippuden Hindi Official Channel:"])))
+    return callbacks
@@ -0,0 +1,151 @@
+"""Minimal stand-ins for the telegram objects the handlers touch.
+
+Only the attributes and coroutines bot.py actually uses are provided.
+Every outbound call is recorded on the RecordingBot instead of being sent.
+Calls are checked against the signature of the real python-telegram-bot
+method, so arguments the real library would reject fail here too.
+"""
+
+import inspect
+import itertools
+from types import SimpleNamespace
+
+from telegram import Bot, CallbackQuery, Message
+
+BOT_ID = 777000
+
+
+def check_call(method, *args, **kwargs):
+    """Raise like the real library would for a call of method (e.g. Bot.send_message) with these arguments"""
+    # TypeError for unknown or missing arguments
+    inspect.signature(method).bind(None, *args, **kwargs)
+    # Same check as Bot, which Message.reply_text hits when it quotes automatically
+    if kwargs.get('allow_sending_without_reply') is not None and kwargs.get('reply_parameters') is not None:
+        raise ValueError("`allow_sending_without_reply` and `reply_parameters` are mutually exclusive.")
+
+
+class RecordingBot:
+    """Stub bot that records every API call and answers instantly"""
+
+    def __init__(self, member_status='administrator'):
+        self.id = BOT_ID
+        self.username = 'benchmark_bot'
+        self.member_status = member_status
+        self.calls = []
+        self._message_ids = itertools.count(1000)
+
+    def _record(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        return SimpleNamespace(message_id=next(self._message_ids), **kwargs)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        check_call(Bot.send_message, chat_id, text, **kwargs)
+        return self._record('send_message', chat_id=chat_id, text=text, **kwargs)
+
+    async def get_chat_member(self, chat_id, user_id, **kwargs):
+        check_call(Bot.get_chat_member, chat_id, user_id, **kwargs)
+        self._record('get_chat_member', chat_id=chat_id, user_id=user_id)
+        return SimpleNamespace(status=self.member_status, user=SimpleNamespace(id=user_id))
+
+    async def get_chat_administrators(self, chat_id, **kwargs):
+        # The default user of message_update / callback_update, with member_status
+        check_call(Bot.get_chat_administrators, chat_id, **kwargs)
+        self._record('get_chat_administrators', chat_id=chat_id)
+        return [SimpleNamespace(status=self.member_status, user=SimpleNamespace(id=42))]
+
+    def __getattr__(self, method):
+        # Any other Bot API method: record it and report success
+        if method.startswith('_'):
+            raise AttributeError(method)
+        real_method = getattr(Bot, method)
+
+        async def call(*args, **kwargs):
+            check_call(real_method, *args, **kwargs)
+            self._record(method, args=args, **kwargs)
+            return True
+        return call
+
+
+class FakeMessage:
+    def __init__(self, bot, chat, user, text, message_id):
+        self._bot = bot
+        self.chat = chat
+        self.chat_id = chat.id
+        self.from_user = user
+        self.text = text
+        self.message_id = message_id
+        self.new_chat_members = []
+
+    async def reply_text(self, text, **kwargs):
+        check_call(Message.reply_text, text, **kwargs)
+        if kwargs.get('reply_parameters') is None and kwargs.get('do_quote') is None and self.chat.type != 'private':
+            # Message.reply_text quotes the message in groups unless told otherwise
+            send_kwargs = {**kwargs, 'reply_parameters': self.message_id}
+            send_kwargs.pop('do_quote', None)
+            check_call(Bot.send_message, self.chat.id, text, **send_kwargs)
+        return self._bot._record('reply_text', chat_id=self.chat.id, text=text, **kwargs)
+
+    async def delete(self, **kwargs):
+        check_call(Message.delete, **kwargs)
+        return self._bot._record('delete_message', chat_id=self.chat.id, message_id=self.message_id)
+
+
+class FakeCallbackQuery:
+    def __init__(self, bot, message, user, data):
+        self._bot = bot
+        self.message = message
+        self.from_user = user
+        self.data = data
+
+    async def answer(self, *args, **kwargs):
+        check_call(CallbackQuery.answer, *args, **kwargs)
+        return self._bot._record('answer_callback_query', data=self.data)
+
+    async def edit_message_text(self, text, **kwargs):
+        check_call(CallbackQuery.edit_message_text, text, **kwargs)
+        return self._bot._record('edit_message_text', chat_id=self.message.chat.id, text=text, **kwargs)
+
+
+class FakeContext:
+    def __init__(self, bot, args=None):
+        self.bot = bot
+        self.args = args or []
+        self.error = None
+        self.bot_data = {}
+        self.chat_data = {}
+        self.user_data = {}
+
+
+def make_chat(chat_id, chat_type='supergroup'):
+    return SimpleNamespace(id=chat_id, type=chat_type, title=f"Group {chat_id}")
+
+
+def make_user(user_id, is_bot=False, first_name='Member'):
+    return SimpleNamespace(id=user_id, is_bot=is_bot, first_name=first_name, username=None)
+
+
+def make_update(message=None, callback_query=None):
+    source = message or callback_query.message
+    user = message.from_user if message else callback_query.from_user
+    return SimpleNamespace(
+        message=message,
+        effective_message=source,
+        effective_chat=source.chat,
+        effective_user=user,
+        callback_query=callback_query,
+    )
+
+
+def message_update(bot, text, chat_id=-1001, user_id=42, is_bot=False, message_id=1):
+    """Update for a text message in a group"""
+    chat = make_chat(chat_id)
+    message = FakeMessage(bot, chat, make_user(user_id, is_bot=is_bot), text, message_id)
+    return make_update(message=message)
+
+
+def callback_update(bot, data, message_text='', chat_id=-1001, user_id=42):
+    """Update for an inline keyboard button press"""
+    chat = make_chat(chat_id)
+    user = make_user(user_id)
+    message = FakeMessage(bot, chat, make_user(BOT_ID, is_bot=True, first_name='Bot'), message_text, 1)
+    return make_update(callback_query=FakeCallbackQuery(bot, message, user, data))
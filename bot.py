@@ -1,19 +1,40 @@
 import os
-import json
 import logging
 import asyncio
 import random
+import secrets
+import signal
+import string
+import time
+from collections import namedtuple
 
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent, ReplyParameters
 from telegram.ext import (
     Application, 
     CommandHandler, 
     MessageHandler, 
     filters, 
     ContextTypes, 
-    CallbackQueryHandler
+    CallbackQueryHandler,
+    ChatMemberHandler,
+    InlineQueryHandler
 )
+from telegram.request import HTTPXRequest
+
+from filter_catalog import FilterCatalog
+from filter_store import JsonLogStore, SqliteFilterStore
+from inline_search import InlineSearch
+from matchers import AhoCorasick, KeywordIndex, RequestPatternMatcher, TrigramIndex, bounded_edit_distance, normalize
+from metrics import registry, timed
+from ad_deletion import DeletionQueue
+from admin_cache import AdminCache
+from chat_settings import ChatSettings
+from error_reports import ErrorReporter
+from outbound import OutboundScheduler, PRIORITY_COMMAND, PRIORITY_REPLY, PRIORITY_WELCOME
+from update_processor import ChatOrderedUpdateProcessor
+from webhook import WebhookReceiver
+from welcomes import WelcomeBatcher
 
 # Load environment variables
 load_dotenv()
@@ -26,11 +47,145 @@ logger = logging.getLogger(__name__)
 
 # Constants
 FILTERS_FILE = 'filters.json'
+CHAT_SETTINGS_FILE = 'chat_settings.json'
+# Set FILTERS_BACKEND=sqlite to keep filters in FILTERS_DB instead of filters.json
+FILTERS_BACKEND = os.getenv('FILTERS_BACKEND', 'json').lower()
+FILTERS_DB = os.getenv('FILTERS_DB', 'filters.db')
 ADMIN_USER_ID = int(os.getenv('ADMIN_USER_ID'))
 BOT_TOKEN = os.getenv('BOT_TOKEN') or ""
+# Set METRICS_PORT to serve Prometheus metrics on http://METRICS_HOST:METRICS_PORT/metrics,
+# and/or METRICS_FILE to dump them to a file every METRICS_DUMP_INTERVAL seconds
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT') or 0)
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_DUMP_INTERVAL = float(os.getenv('METRICS_DUMP_INTERVAL') or 60)
+# Joins are gathered for WELCOME_WINDOW seconds and welcomed with one message; a welcome
+# within WELCOME_COOLDOWN seconds of the previous one replaces it
+WELCOME_WINDOW = float(os.getenv('WELCOME_WINDOW') or 5)
+WELCOME_COOLDOWN = float(os.getenv('WELCOME_COOLDOWN') or 60)
+# Handler errors are summarized to ADMIN_USER_ID this often (seconds)
+ERROR_SUMMARY_INTERVAL = float(os.getenv('ERROR_SUMMARY_INTERVAL') or 300)
+# BOT_MODE=webhook receives updates on http://WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH
+# instead of long polling; WEBHOOK_URL is the public URL registered with Telegram
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT') or 8443)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+# Updates waiting to be handled; webhook deliveries beyond this are deferred
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE') or 1000)
+# Handlers running at once; updates from the same chat always run one at a time, in order
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES') or 16)
+
+def create_filter_store():
+    """Create the configured filter store, migrating filters.json into SQLite on first use"""
+    json_store = JsonLogStore(FILTERS_FILE)
+    if FILTERS_BACKEND != 'sqlite':
+        return json_store
+    sqlite_store = SqliteFilterStore(FILTERS_DB)
+    sqlite_store.migrate_from(json_store)
+    return sqlite_store
+
+# Filters are kept in memory and only re-read when the store changes on disk
+catalog = FilterCatalog(create_filter_store())
+
+# Per-group settings like ad deletion, kept across restarts. Only updates from a
+# group read or write its settings, and those run one at a time (see
+# ChatOrderedUpdateProcessor), so concurrent processing needs no lock here
+chat_settings = ChatSettings(JsonLogStore(CHAT_SETTINGS_FILE))
+
+# ===== METRICS =====
+HANDLER_LATENCY = registry.histogram(
+    'bot_handler_seconds', "Time spent in each update handler", ['handler'])
+HANDLER_ERRORS = registry.counter(
+    'bot_handler_errors_total', "Updates whose handler raised an exception")
+STAGE_LATENCY = registry.histogram(
+    'bot_message_stage_seconds', "Time spent matching in each handle_message stage", ['stage'])
+STAGE_MATCHES = registry.counter(
+    'bot_message_stage_matches_total', "Messages answered by each handle_message stage", ['stage'])
+# Children of the handle_message stage metrics, created once for the hot path
+_STAGE_TIMERS = {stage: STAGE_LATENCY.labels(stage) for stage in ('conversation', 'keyword', 'fuzzy')}
+_STAGE_MATCHES = {
+    stage: STAGE_MATCHES.labels(stage) for stage in ('conversation', 'keyword', 'route', 'exact', 'fuzzy', 'none')
+}
+API_LATENCY = registry.histogram(
+    'bot_api_request_seconds', "Latency of outbound Bot API requests", ['method'])
+API_ERRORS = registry.counter(
+    'bot_api_request_errors_total', "Outbound Bot API requests that failed", ['method', 'reason'])
+
+class MetricsHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest that records latency and failures of every Bot API call"""
 
-# Dictionary to store ad deletion state for each group
-ad_deletion_states = {}
+    async def do_request(self, url, method, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception as e:
+            API_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            API_LATENCY.labels(api_method).time_since(started)
+        if code >= 400:
+            API_ERRORS.inc(api_method, str(code))
+        return code, payload
+
+# ===== OUTBOUND MESSAGES =====
+# Every message the bot sends is queued here and sent within Telegram's rate limits
+outbound = OutboundScheduler()
+
+def send_reply(update, context, text, reply_markup=None, parse_mode=None, priority=PRIORITY_REPLY):
+    """Send text to update's chat, as a reply to its message if it has one.
+
+    Every message the bot sends goes through here and the outbound
+    scheduler, which retries network errors and flood waits with backoff,
+    gives up on permanent errors and stops sending to chats that keep
+    failing. Returns the scheduler's future; callers normally don't await it.
+    """
+    chat_id = update.effective_chat.id
+    message = update.message
+    if message is None:
+        return send_to_chat(context.bot, chat_id, text, reply_markup, parse_mode, priority)
+    # Still sent (just not as a reply) if the user deleted their message meanwhile. Passed
+    # inside reply_parameters: reply_text quotes in groups, and rejects it as a separate argument
+    reply_parameters = ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True)
+    call = lambda: message.reply_text(
+        text, reply_markup=reply_markup, parse_mode=parse_mode, reply_parameters=reply_parameters
+    )
+    # Pre-rendered keyboards are shared objects, so identical replies have identical keys
+    return outbound.submit(chat_id, call, priority, coalesce_key=(text, id(reply_markup), parse_mode))
+
+def send_to_chat(bot, chat_id, text, reply_markup=None, parse_mode=None, priority=PRIORITY_REPLY):
+    """Send text to chat_id through the outbound scheduler, like send_reply but not as a reply"""
+    call = lambda: bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup, parse_mode=parse_mode)
+    return outbound.submit(chat_id, call, priority, coalesce_key=(text, id(reply_markup), parse_mode))
+
+# Group administrators, for admin-only commands (kept current by track_chat_members)
+admin_cache = AdminCache()
+
+# Ads from other bots, deleted in batches per chat (also kept current by track_chat_members)
+ad_deletions = DeletionQueue()
+
+# Throttles the "something went wrong" notices and collects errors for the admin summary
+error_reporter = ErrorReporter()
+
+async def report_errors_periodically(bot):
+    """Send the admin a summary of the errors every ERROR_SUMMARY_INTERVAL seconds, if there were any"""
+    while True:
+        await asyncio.sleep(ERROR_SUMMARY_INTERVAL)
+        summary = error_reporter.summary()
+        if summary:
+            send_to_chat(bot, ADMIN_USER_ID, summary)
+
+async def dump_metrics_periodically():
+    """Write the metrics to METRICS_FILE every METRICS_DUMP_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(METRICS_DUMP_INTERVAL)
+        try:
+            registry.dump(METRICS_FILE)
+        except OSError as e:
+            logger.error(f"Error dumping metrics to {METRICS_FILE}: {e}")
 
 # Predefined filters
 PREDEFINED_FILTERS = {
@@ -56,36 +211,55 @@ CHANNEL_LINKS = {
     "Movie Channel": "https://t.me/andi_mandi_sandi_clicklink_again"
 }
 
+# Common request patterns before anime name
+REQUEST_PREFIXES = [
+    "i want", "give me", "looking for", "search for",
+    "can i get", "please give", "need", "where is",
+    "how to watch", "link for", "link to"
+]
+
+# Common patterns after anime name
+REQUEST_SUFFIXES = [
+    "anime", "channel", "please", "link", "group",
+    "telegram", "hindi", "english", "episode", "episodes"
+]
+
+request_matcher = RequestPatternMatcher(REQUEST_PREFIXES, REQUEST_SUFFIXES)
+
+# Fuzzy title matching only runs when every exact stage missed; these bound
+# how much work a single message may cost
+FUZZY_MAX_CANDIDATES = 20
+FUZZY_TIME_BUDGET = 0.001  # seconds
+
+# Ready-to-send replies for one filter, see build_filter_replies()
+FilterReply = namedtuple('FilterReply', [
+    'content', 'found_text', 'suggest_text', 'markup', 'browse_text', 'browse_markup',
+    'label', 'route_text', 'route_markup', 'options_markup'
+])
+
 # Ensure filters file exists
 def init_filters():
     """Initialize filters file with predefined filters"""
-    if os.path.exists(FILTERS_FILE):
-        # Load existing filters
-        existing_filters = load_filters()
-        # Add predefined filters (without overwriting existing ones)
-        for name, data in PREDEFINED_FILTERS.items():
-            if name not in existing_filters:
-                existing_filters[name] = data
-        save_filters(existing_filters)
-    else:
-        # Create new filters file with predefined filters
-        with open(FILTERS_FILE, 'w') as f:
-            json.dump(PREDEFINED_FILTERS, f)
+    existing_filters = load_filters()
+    # Add predefined filters (without overwriting existing ones)
+    missing = {name: data for name, data in PREDEFINED_FILTERS.items() if name not in existing_filters}
+    if missing:
+        save_filters({**existing_filters, **missing})
 
 def load_filters():
-    """Load filters from file"""
-    try:
-        with open(FILTERS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    """Load filters from the in-memory catalog.
+
+    The returned dict is shared by every handler, do not modify it; use
+    save_filters/add_filter/remove_filter instead. Inside catalog.batch()
+    it includes the batch's changes so far.
+    """
+    return catalog.filters
 
 def save_filters(filters):
     """Save filters to file"""
-    with open(FILTERS_FILE, 'w') as f:
-        json.dump(filters, f)
+    catalog.replace(filters)
 
-def add_filter(name, content, use_buttons=None, button_links=None):
+def add_filter(name, content, use_buttons=None, button_links=None, aliases=None, **extra):
     """Add a filter programmatically
 
     Parameters:
@@ -93,28 +267,358 @@ def add_filter(name, content, use_buttons=None, button_links=None):
     content (str): The content of the filter
     use_buttons (bool, optional): Whether to use buttons. If None, determined by newlines in content
     button_links (dict, optional): Dictionary mapping button text to URLs. Format: {"Button text": "https://example.com"}
+    aliases (list, optional): Keywords that show this filter when they appear in a message, e.g. ["aot", "titan"]
+    extra: Other catalog data stored with the filter, e.g.
+        direct_reply={"text": "...", "button_links": {...}} to answer an exact match with its own text and buttons
+        popular=True to answer an exact match with only the first link
+        category="anime" or "movie" to list the filter in /anime or /movie, as display_name,
+        ordered by sort_order (see build_title_lists)
+        title_list="anime" to use the generated /anime list as the content
     """
     # Determine if we should use buttons (if not specified)
     if use_buttons is None:
         use_buttons = '\n' in content
 
-    filters = load_filters()
-    filters[name.lower()] = {
+    filter_data = {
         'content': content,
         'use_buttons': use_buttons,
         'button_links': button_links
     }
-    save_filters(filters)
+    if aliases:
+        filter_data['aliases'] = [alias.lower() for alias in aliases]
+    filter_data.update(extra)
+    catalog.set(name.lower(), filter_data)
     logger.info(f"Filter '{name}' added programmatically")
 
 def remove_filter(name):
     """Remove a filter programmatically"""
-    filters = load_filters()
-    if name.lower() in filters:
-        del filters[name.lower()]
-        save_filters(filters)
+    if catalog.discard(name.lower()):
         logger.info(f"Filter '{name}' removed programmatically")
 
+def get_name_matcher():
+    """Matcher over all filter names, rebuilt only when the filters change"""
+    return catalog.compiled('names', lambda filters: AhoCorasick(filters.keys()))
+
+def build_filter_replies(filters):
+    """Pre-render the reply text and keyboards of every filter"""
+    replies = {}
+    title_lists = get_title_lists()
+    for name, filter_data in filters.items():
+        content = filter_data['content']
+        if filter_data.get('title_list'):
+            content = title_lists[filter_data['title_list']]
+        button_links = filter_data.get('button_links', None) or {}
+
+        # One button per link, used by most matches
+        link_rows = [[InlineKeyboardButton(title, url=url)] for title, url in button_links.items()]
+        markup = InlineKeyboardMarkup(link_rows) if link_rows else None
+        browse_markup = InlineKeyboardMarkup(link_rows + [[InlineKeyboardButton("Back", callback_data="show_popular")]])
+
+        # Display label, taken from the cleaned-up title of the first link
+        label = None
+        if button_links:
+            title = next(iter(button_links))
+            label = f"{link_title_text(title)} Channel:"
+
+        # Direct routes answer with their own text and buttons, popular anime
+        # with their label and first link only
+        route_text = route_markup = None
+        direct_reply = filter_data.get('direct_reply', None)
+        if direct_reply:
+            route_text = direct_reply['text']
+            route_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton(title, url=url)] for title, url in direct_reply['button_links'].items()
+            ])
+        elif filter_data.get('popular', False) and button_links:
+            title, url = next(iter(button_links.items()))
+            route_text = label
+            route_markup = InlineKeyboardMarkup([[InlineKeyboardButton(title, url=url)]])
+
+        # Exact matches of button filters show every line of the content, 2 per row
+        options_markup = None
+        if filter_data.get('use_buttons', False):
+            options = [line.strip() for line in content.split('\n') if line.strip()]
+            buttons = []
+            for i, option in enumerate(options):
+                if option in button_links:
+                    buttons.append(InlineKeyboardButton(option, url=button_links[option]))
+                else:
+                    buttons.append(InlineKeyboardButton(option, callback_data=f"option_{options.index(option) if button_links else i}"))
+            options_markup = InlineKeyboardMarkup([buttons[i:i + 2] for i in range(0, len(buttons), 2)])
+
+        replies[name] = FilterReply(
+            content=content,
+            found_text=f"Found '{name}' channel for you:",
+            suggest_text=f"Did you mean '{name}'? Here is the channel:",
+            markup=markup,
+            browse_text=f"{name.title()} Channel:",
+            browse_markup=browse_markup,
+            label=label,
+            route_text=route_text,
+            route_markup=route_markup,
+            options_markup=options_markup
+        )
+    return replies
+
+def get_filter_replies():
+    """Pre-rendered replies of all filters, rebuilt only when the filters change"""
+    return catalog.compiled('replies', build_filter_replies)
+
+def get_fuzzy_index():
+    """Trigram index over all filter names and aliases, rebuilt only when the filters change"""
+    def build(filters):
+        terms = []
+        for name, data in filters.items():
+            terms.append((name, name))
+            terms.extend((alias, name) for alias in data.get('aliases') or ())
+        return TrigramIndex(terms)
+    return catalog.compiled('fuzzy', build)
+
+def get_keyword_index():
+    """Index over the keyword aliases of all filters, rebuilt only when the filters change"""
+    return catalog.compiled('keywords', lambda filters: KeywordIndex(
+        (alias, name) for name, data in filters.items() for alias in data.get('aliases') or ()
+    ))
+
+# Header of the list of each filter category, see build_title_lists
+TITLE_LIST_HEADERS = {
+    'anime': "All Anime/Manga Channels Available:",
+    'movie': "All Anime Movies Available:",
+}
+
+# Under the /anime and /movie lists opened from the menu
+BACK_TO_MENU_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")]])
+
+def build_title_lists(filters):
+    """Render the numbered /anime and /movie lists from the filters' category, display_name and sort_order"""
+    entries = {category: [] for category in TITLE_LIST_HEADERS}
+    for name, filter_data in filters.items():
+        category = filter_data.get('category')
+        if category in entries:
+            display_name = filter_data.get('display_name') or name.title()
+            # Filters without a sort_order go last, alphabetically
+            sort_order = filter_data.get('sort_order')
+            entries[category].append((sort_order is None, sort_order or 0, display_name.lower(), display_name))
+        elif filter_data.get('display_name') or filter_data.get('sort_order'):
+            logger.warning(f"Filter '{name}' has a display_name or sort_order but no category, it is not listed")
+
+    lists = {}
+    for category, titles in entries.items():
+        titles.sort()
+        # sort_order is the position in the hand-written lists these replaced,
+        # so a gap is a title that lost its filter or its category
+        sort_orders = {title[1] for title in titles if not title[0]}
+        missing = [n for n in range(1, max(sort_orders, default=0)) if n not in sort_orders]
+        if missing:
+            logger.warning(f"No {category} filter has sort_order {', '.join(map(str, missing))}, "
+                           f"those titles are missing from the /{category} list")
+        lines = [TITLE_LIST_HEADERS[category]]
+        lines.extend(f"{number}. {title[-1]}" for number, title in enumerate(titles, 1))
+        lists[category] = "\n".join(lines)
+    return lists
+
+def get_title_lists():
+    """The /anime and /movie lists by category, rebuilt only when the filters change"""
+    return catalog.compiled('title_lists', build_title_lists)
+
+def group_channels(filters):
+    """Names of the filters of each channel, main filter first, listed channels first in list order.
+
+    Filters with the same links ("solo", "solo leveling", "sung jinwoo") are
+    one channel, and the one with a display_name is its main filter. Unlisted
+    channels that are copies of a listed one, with one of its links or about
+    its title ("haikyu", "solo levelin", "aot_channel"), are left out.
+    """
+    channels = {}
+    for name, filter_data in filters.items():
+        button_links = filter_data.get('button_links') or {}
+        if not button_links:
+            continue
+        channel = channels.setdefault(tuple(button_links.values()), [])
+        if filter_data.get('display_name'):
+            channel.insert(0, name)
+        else:
+            channel.append(name)
+
+    listed_urls = set()
+    listed_titles = []
+    for urls, names in channels.items():
+        if filters[names[0]].get('display_name'):
+            listed_urls.update(urls)
+            listed_titles.append(normalize(filters[names[0]]['display_name']))
+    def is_copy(urls, names):
+        if filters[names[0]].get('display_name'):
+            return False
+        if listed_urls.intersection(urls):
+            return True
+        title = normalize(channel_title(filters, names[0]))
+        return any(
+            title.startswith(listed) or bounded_edit_distance(title, listed, max(1, len(listed) // 6)) is not None
+            for listed in listed_titles
+        )
+
+    # Listed channels in list order, then the others in catalog order
+    categories = list(TITLE_LIST_HEADERS)
+    def rank(names):
+        filter_data = filters[names[0]]
+        category = filter_data.get('category')
+        if category not in TITLE_LIST_HEADERS:
+            return (len(categories), 0)
+        return (categories.index(category), filter_data.get('sort_order') or 0)
+    return sorted((names for urls, names in channels.items() if not is_copy(urls, names)), key=rank)
+
+def link_title_text(title):
+    """What a link button is about, e.g. "Join our Haikyu channel!" is about Haikyu"""
+    return title.replace('Join our', '').replace('channel!', '').strip()
+
+def channel_title(filters, name):
+    """Title a channel is shown under, given its main filter.
+
+    Unlisted channels are shown under the text of their only link, or their
+    name with each word capitalized if they have several (menus like "movies").
+    """
+    filter_data = filters[name]
+    if filter_data.get('display_name'):
+        return filter_data['display_name']
+    button_links = filter_data['button_links']
+    if len(button_links) == 1:
+        return link_title_text(next(iter(button_links))).strip('⚜️! ')
+    # Not str.title(), which gives "An Archdemon'S Dilemma"
+    return string.capwords(name)
+
+def build_inline_search(filters):
+    """Inline query results, one per channel, with the index of the titles and aliases leading to them"""
+    replies = get_filter_replies()
+    results = {}
+    titles = []
+    other_terms = []
+    for names in group_channels(filters):
+        key = filters[names[0]]['short_id']
+        title = channel_title(filters, names[0])
+        reply = replies[names[0]]
+        results[key] = InlineQueryResultArticle(
+            id=str(key),
+            title=title,
+            input_message_content=InputTextMessageContent(reply.label or f"{title} Channel:"),
+            reply_markup=reply.markup
+        )
+        # Titles rank above the other names and aliases
+        titles.append((title, key))
+        for name in names:
+            other_terms.append((name, key))
+            other_terms.extend((alias, key) for alias in filters[name].get('aliases') or ())
+    return InlineSearch(titles + other_terms, results)
+
+def get_inline_search():
+    """Inline query search, rebuilt only when the filters change"""
+    return catalog.compiled('inline', build_inline_search)
+
+# Channels per page of the A–Z browser
+BROWSE_PAGE_SIZE = 8
+
+# The "Popular Channels" menu, as (button text, filter name)
+POPULAR_CHANNELS = [
+    ("One Piece", "one piece"),
+    ("Attack on Titan", "attack on titan"),
+    ("Naruto Shippuden", "naruto shippuden"),
+    ("Solo Leveling", "solo leveling"),
+    ("Dragon Ball", "dragon ball"),
+]
+
+# Ready-to-send catalog menus, see build_catalog_browser()
+CatalogBrowser = namedtuple('CatalogBrowser', ['names', 'pages', 'items', 'popular_markup'])
+
+def build_catalog_browser(filters):
+    """Pre-render the A–Z browser pages, the screen of every channel in it and the popular menu.
+
+    Their buttons send "browse_<page>", "item_<short_id>" (a channel opened
+    from the browser) and "filter_<short_id>" (a filter opened from another
+    menu), which always fit in callback_data and decode with a dict lookup.
+    """
+    # short_id -> filter name
+    names = {filter_data['short_id']: name for name, filter_data in filters.items()}
+    replies = get_filter_replies()
+
+    channels = sorted(group_channels(filters), key=lambda channel: channel_title(filters, channel[0]).lower())
+    chunks = [channels[i:i + BROWSE_PAGE_SIZE] for i in range(0, len(channels), BROWSE_PAGE_SIZE)] or [[]]
+    pages = []
+    items = {}
+    for index, chunk in enumerate(chunks):
+        rows = []
+        back = [InlineKeyboardButton("Back", callback_data=f"browse_{index}")]
+        for channel in chunk:
+            title = channel_title(filters, channel[0])
+            short_id = filters[channel[0]]['short_id']
+            rows.append([InlineKeyboardButton(title, callback_data=f"item_{short_id}")])
+            link_rows = list(replies[channel[0]].markup.inline_keyboard)
+            items[short_id] = (f"{title} Channel:", InlineKeyboardMarkup(link_rows + [back]))
+
+        navigation = []
+        if index > 0:
+            navigation.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"browse_{index - 1}"))
+        if index < len(chunks) - 1:
+            navigation.append(InlineKeyboardButton("Next ➡️", callback_data=f"browse_{index + 1}"))
+        if navigation:
+            rows.append(navigation)
+        rows.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
+        pages.append((f"All Channels A–Z ({index + 1}/{len(chunks)}):", InlineKeyboardMarkup(rows)))
+
+    popular_rows = [
+        [InlineKeyboardButton(text, callback_data=f"filter_{filters[name]['short_id']}")]
+        for text, name in POPULAR_CHANNELS if name in filters
+    ]
+    popular_rows.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
+    return CatalogBrowser(names, pages, items, InlineKeyboardMarkup(popular_rows))
+
+def get_catalog_browser():
+    """Catalog menus, rebuilt only when the filters change"""
+    return catalog.compiled('browser', build_catalog_browser)
+
+# Characters of entries per /checkall page, leaving room for the header under Telegram's 4096
+CHECKALL_PAGE_LENGTH = 4000
+
+def build_checkall_pages(filters):
+    """Render the /checkall listing as pages of whole entries, each with its Prev/Next keyboard"""
+    entries = [
+        f"• {filter_name.title()}\n  Link: {url}\n\n"
+        for filter_name, filter_data in filters.items()
+        for url in (filter_data.get('button_links') or {}).values()
+    ]
+
+    # Break between entries, never inside one
+    chunks = []
+    chunk = []
+    length = 0
+    for entry in entries:
+        if chunk and length + len(entry) > CHECKALL_PAGE_LENGTH:
+            chunks.append(chunk)
+            chunk = []
+            length = 0
+        chunk.append(entry)
+        length += len(entry)
+    chunks.append(chunk)
+
+    pages = []
+    for index, chunk in enumerate(chunks):
+        if len(chunks) == 1:
+            header = "📋 All Available Filters and Links:\n\n"
+            markup = None
+        else:
+            header = f"📋 All Available Filters and Links ({index + 1}/{len(chunks)}):\n\n"
+            buttons = []
+            if index > 0:
+                buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"checkall_{index - 1}"))
+            if index < len(chunks) - 1:
+                buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"checkall_{index + 1}"))
+            markup = InlineKeyboardMarkup([buttons])
+        pages.append((header + "".join(chunk), markup))
+    return pages
+
+def get_checkall_pages():
+    """Pages of /checkall, rebuilt only when the filters change"""
+    return catalog.compiled('checkall', build_checkall_pages)
+
+@timed(HANDLER_LATENCY.labels('start'))
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
     user = update.effective_user
@@ -122,6 +626,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         [InlineKeyboardButton("List All Anime", callback_data="show_anime_list")],
         [InlineKeyboardButton("List All Movies", callback_data="show_anime_movie_list")],
         [InlineKeyboardButton("Popular Channels", callback_data="show_popular")],
+        [InlineKeyboardButton("Browse A–Z", callback_data="browse_0")],
         [InlineKeyboardButton("Help", callback_data="show_help")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -134,8 +639,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         f"You can also use me in groups to help members discover anime channels!"
     )
 
-    await update.message.reply_text(welcome_message, reply_markup=reply_markup)
+    send_reply(update, context, welcome_message, reply_markup=reply_markup, priority=PRIORITY_COMMAND)
 
+@timed(HANDLER_LATENCY.labels('button_callback'))
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle button callbacks"""
     query = update.callback_query
@@ -143,26 +649,13 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     # Handle menu buttons
     if query.data == "show_anime_list":
-        await query.edit_message_text(
-            text="All Anime/Manga Channels Available:\n1. Dragon Ball Diama\n2. The Angel Next Door\n3. Dandadan\n4. Code Geass\n5. Tokyo Revengers\n6. 365 Days to the Wedding\n7. Bleach\n8. Banished From Hero's Party\n9. Castlevania Nocturne\n10. Hunter X Hunter\n11. Fairy Tail\n12. Tomb Raider\n13. True Beauty\n14. Trillion Game\n15. Reincarnated as a Slime\n16. Blue Lock\n17. The Exclusive Samurai\n18. Days With My Stepsister\n19. Vinland Saga\n20. Alya Sometimes Hides Feelings\n21. Nobody Remember Me\n22. Tower of God\n23. Haikyu\n24. Bye Bye Earth\n25. Black Summoner\n26. Mushoku Tensei\n27. Strongest Magician\n28. Kaiju No. 8\n29. Iceblade Sorcerer\n30. Makeine\n31. Black Clover\n32. Red Ranger\n33. Archdemon's Dilemma\n34. Dr. Stone\n35. Berserk of Gluttony\n36. Reincarnated Aristocrat\n37. One Piece\n38. Record of Ragnarok\n39. Solo Leveling\n40. Sakamoto Days\n41. Hell's Paradise\n42. Tokyo 24th Ward\n43. Wind Breaker\n44. i parry everything\n45. naruto shippuden\n 46. devil may cry\n 47. berserk\n48.  JoJo's Bizarre Adventure \n 49. My Hero Academia \n50. lookism \n51. demon slayer \n52. my dress up darling \n53. death note\n54. I'M Getting Married to a Girl I hate\n54. masmune kun no revenge.\n55. Spy x Family.\n56. boruto."
-        )
+        await query.edit_message_text(text=get_title_lists()['anime'], reply_markup=BACK_TO_MENU_MARKUP)
         return
     elif query.data == "show_anime_movie_list":
-        await query.edit_message_text(
-            text="All Anime Movies Available:\n1. Howls Moving Castle (2004)\n2. Grave of the Fireflies\n3. I want to eat your pancreas\n4. Princess Mononoke (1997)\n4. Your Name(kimi no nawa)\n5. weathering with you\n6. my neighbour totoro\n7. black clover: sword of the wizard king\n8. A Silent Voice\n9. chhota bheem movies"
-        )
+        await query.edit_message_text(text=get_title_lists()['movie'], reply_markup=BACK_TO_MENU_MARKUP)
         return
     elif query.data == "show_popular":
-        keyboard = [
-            [InlineKeyboardButton("One Piece", callback_data="anime_one_piece")],
-            [InlineKeyboardButton("Attack on Titan", callback_data="anime_attack_on_titan")],
-            [InlineKeyboardButton("Naruto Shippuden", callback_data="anime_naruto_shippuden")],
-            [InlineKeyboardButton("Solo Leveling", callback_data="anime_solo_leveling")],
-            [InlineKeyboardButton("Dragon Ball", callback_data="anime_dragon_ball")],
-            [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text="Choose a popular anime:", reply_markup=reply_markup)
+        await query.edit_message_text(text="Choose a popular anime:", reply_markup=get_catalog_browser().popular_markup)
         return
     elif query.data == "show_help":
         help_text = (
@@ -188,6 +681,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             [InlineKeyboardButton("List All Anime", callback_data="show_anime_list")],
             [InlineKeyboardButton("List All Movies", callback_data="show_anime_movie_list")],
             [InlineKeyboardButton("Popular Channels", callback_data="show_popular")],
+            [InlineKeyboardButton("Browse A–Z", callback_data="browse_0")],
             [InlineKeyboardButton("Help", callback_data="show_help")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -198,50 +692,71 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
 
-    # Handle specific anime callbacks
+    # Flip the /checkall listing to another page, in the same message
+    if query.data.startswith("checkall_"):
+        if not await admin_cache.is_admin(context.bot, query.message.chat.id, query.from_user.id):
+            return
+        pages = get_checkall_pages()
+        # The listing may have shrunk since the buttons were sent
+        index = min(int(query.data.replace("checkall_", "")), len(pages) - 1)
+        text, markup = pages[index]
+        await query.edit_message_text(text=text, reply_markup=markup)
+        return
+
+    # Catalog buttons carry a filter's short_id, see build_catalog_browser
+    if query.data.startswith("browse_"):
+        pages = get_catalog_browser().pages
+        # The catalog may have shrunk since the buttons were sent
+        index = min(int(query.data.replace("browse_", "")), len(pages) - 1)
+        text, markup = pages[index]
+        await query.edit_message_text(text=text, reply_markup=markup)
+        return
+
+    if query.data.startswith("item_"):
+        item = get_catalog_browser().items.get(int(query.data.replace("item_", "")))
+        if item:
+            text, markup = item
+            await query.edit_message_text(text=text, reply_markup=markup)
+            return
+
+    if query.data.startswith("filter_"):
+        name = get_catalog_browser().names.get(int(query.data.replace("filter_", "")))
+        reply = get_filter_replies().get(name)
+        if reply and reply.markup:
+            await query.edit_message_text(text=reply.browse_text, reply_markup=reply.browse_markup)
+            return
+
+    # Popular menus sent before filters had short ids
     if query.data.startswith("anime_"):
         anime_name = query.data.replace("anime_", "").replace("_", " ")
-        filters = load_filters()
-        if anime_name in filters:
-            filter_data = filters[anime_name]
-            button_links = filter_data.get('button_links', None)
-
-            if button_links:
-                keyboard = []
-                for title, url in button_links.items():
-                    keyboard.append([InlineKeyboardButton(title, url=url)])
-
-                # Add back button
-                keyboard.append([InlineKeyboardButton("Back", callback_data="show_popular")])
-                reply_markup = InlineKeyboardMarkup(keyboard)
-
-                await query.edit_message_text(
-                    text=f"{anime_name.title()} Channel:",
-                    reply_markup=reply_markup
-                )
-                return
+        reply = get_filter_replies().get(anime_name)
+        if reply and reply.markup:
+            await query.edit_message_text(text=reply.browse_text, reply_markup=reply.browse_markup)
+            return
 
     # For channel options, maintain the buttons with links rather than just showing selection
     if query.data.startswith("option_") and "naruto shippuden" in query.message.text.lower():
-        filters = load_filters()
-        if "naruto shippuden" in filters:
-            filter_data = filters["naruto shippuden"]
-            button_links = filter_data.get('button_links', None)
-
-            if button_links:
-                keyboard = []
-                for option, url in button_links.items():
-                    keyboard.append([InlineKeyboardButton(option, url=url)])
-
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text="Naruto Shippuden Hindi Official Channel:", reply_markup=reply_markup)
-                return
+        reply = get_filter_replies().get("naruto shippuden")
+        if reply and reply.markup:
+            await query.edit_message_text(text="Naruto Shippuden Hindi Official Channel:", reply_markup=reply.markup)
+            return
 
     # Just acknowledge other button presses
     if query.data.startswith("option_"):
         option_index = int(query.data.replace("option_", ""))
         await query.edit_message_text(f"You selected option {option_index+1}")
 
+# Seconds Telegram may answer the same inline query from its cache; results are the same for everyone
+INLINE_CACHE_TIME = 300
+
+@timed(HANDLER_LATENCY.labels('inline_query'))
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer "@bot <title>" with the matching channels"""
+    query = update.inline_query
+    results = get_inline_search().search(query.query)
+    await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+
+@timed(HANDLER_LATENCY.labels('help_command'))
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /help is issued."""
     # Basic help text for all users
@@ -264,8 +779,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "*Note:* Type the full name exactly as shown in the anime list for best results."
     )
 
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    send_reply(update, context, help_text, parse_mode='Markdown', priority=PRIORITY_COMMAND)
 
+@timed(HANDLER_LATENCY.labels('command_command'))
 async def command_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a detailed list of all commands when /command is issued."""
     # Basic commands for all users
@@ -283,49 +799,47 @@ async def command_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         "• /ad off - Disable ad deletion\n"
     )
 
-    await update.message.reply_text(command_text, parse_mode='Markdown')
+    send_reply(update, context, command_text, parse_mode='Markdown', priority=PRIORITY_COMMAND)
 
+@timed(HANDLER_LATENCY.labels('anime_list_command'))
 async def anime_list_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send the anime list when the command /anime is issued."""
-    # Use the same content as the "anime list" filter
-    anime_list_text = "All Anime/Manga Channels Available:\n1. Dragon Ball Diama\n2. The Angel Next Door\n3. Dandadan\n4. Code Geass\n5. Tokyo Revengers\n6. 365 Days to the Wedding\n7. Bleach\n8. Banished From Hero's Party\n9. Castlevania Nocturne\n10. Hunter X Hunter\n11. Fairy Tail\n12. Tomb Raider\n13. True Beauty\n14. Trillion Game\n15. Reincarnated as a Slime\n16. Blue Lock\n17. The Exclusive Samurai\n18. Days With My Stepsister\n19. Vinland Saga\n20. Alya Sometimes Hides Feelings\n21. Nobody Remember Me\n22. Tower of God\n23. Haikyu\n24. Bye Bye Earth\n25. Black Summoner\n26. Mushoku Tensei\n27. Strongest Magician\n28. Kaiju No. 8\n29. Iceblade Sorcerer\n30. Makeine\n31. Black Clover\n32. Red Ranger\n33. Archdemon's Dilemma\n34. Dr. Stone\n35. Berserk of Gluttony\n36. Reincarnated Aristocrat\n37. One Piece\n38. Record of Ragnarok\n39. Solo Leveling\n40. Sakamoto Days\n41. Hell's Paradise\n42. Tokyo 24th Ward\n43. Wind Breaker\n44. i parry everything\n45. naruto shippuden\n 46. devil may cry\n 47. berserk \n48.  JoJo's Bizarre Adventure \n 49. My Hero Academia \n50. lookism \n51. demon slayer \n52. my dress up darling \n53. death note\n54. I'M Getting Married to a Girl I hate"
-
-    await update.message.reply_text(anime_list_text)
+    # Same list as the "anime list" filter and the menu
+    send_reply(update, context, get_title_lists()['anime'], priority=PRIORITY_COMMAND)
 
+@timed(HANDLER_LATENCY.labels('ad_command'))
 async def ad_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /ad command to toggle ad deletion"""
     # Check if command is used in a group
     if update.effective_chat.type not in ['group', 'supergroup']:
-        await update.message.reply_text("This command can only be used in groups!")
+        send_reply(update, context, "This command can only be used in groups!", priority=PRIORITY_COMMAND)
         return
 
-    # Get the chat member who sent the command
+    # Check if the user who sent the command is the group owner or an admin
     user = update.effective_user
-    chat_member = await context.bot.get_chat_member(update.effective_chat.id, user.id)
-
-    # Check if user is the group owner
-    if chat_member.status not in ['creator', 'administrator']:
-        await update.message.reply_text("Only group owners and administrators can use this command!")
+    if not await admin_cache.is_admin(context.bot, update.effective_chat.id, user.id):
+        send_reply(update, context, "Only group owners and administrators can use this command!", priority=PRIORITY_COMMAND)
         return
 
     # Get the command argument
     args = context.args
     if not args:
-        await update.message.reply_text("Please specify 'on' or 'off' after the command!")
+        send_reply(update, context, "Please specify 'on' or 'off' after the command!", priority=PRIORITY_COMMAND)
         return
 
     command = args[0].lower()
     chat_id = update.effective_chat.id
 
     if command == 'on':
-        ad_deletion_states[chat_id] = True
-        await update.message.reply_text("Ad deletion has been enabled. I will now delete promotional messages from other bots.")
+        chat_settings.set(chat_id, 'ad_deletion', True)
+        send_reply(update, context, "Ad deletion has been enabled. I will now delete promotional messages from other bots.", priority=PRIORITY_COMMAND)
     elif command == 'off':
-        ad_deletion_states[chat_id] = False
-        await update.message.reply_text("Ad deletion has been disabled. I will no longer delete promotional messages.")
+        chat_settings.set(chat_id, 'ad_deletion', False)
+        send_reply(update, context, "Ad deletion has been disabled. I will no longer delete promotional messages.", priority=PRIORITY_COMMAND)
     else:
-        await update.message.reply_text("Please use '/ad on' or '/ad off'")
+        send_reply(update, context, "Please use '/ad on' or '/ad off'", priority=PRIORITY_COMMAND)
 
+@timed(HANDLER_LATENCY.labels('handle_message'))
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle incoming messages"""
     # # Check for specific user ID and reply "kamine"
@@ -336,329 +850,83 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Check for ad deletion if message is from a bot
     if update.message.from_user.is_bot and update.message.from_user.id != context.bot.id:
         chat_id = update.effective_chat.id
-        if ad_deletion_states.get(chat_id, False):
-            try:
-                await update.message.delete()
-                return
-            except Exception as e:
-                logger.error(f"Error deleting ad message: {e}")
+        # Not queued if the bot isn't allowed to delete here; then it's handled like any message
+        if chat_settings.get(chat_id, 'ad_deletion', False) and ad_deletions.add(context.bot, chat_id, update.message.message_id):
+            return
 
     # Get original message text and lowercase version
     original_text = update.message.text
     text = original_text.lower().strip()
     filters = load_filters()
+    replies = get_filter_replies()
 
     # Check for admin/owner mentions
     if text in ["admin", "owner"]:
-        await update.message.reply_text("my cute owner Lord @Saiksh_pagi 😉😉")
+        send_reply(update, context, "my cute owner Lord @Saiksh_pagi 😉😉")
         return
 
     # Handle anime list separately
     if text == "anime list":
-        try:
-            await update.message.reply_text("All Anime/Manga Channels Available:\n1. Dragon Ball Diama\n2. The Angel Next Door\n3. Dandadan\n4. Code Geass\n5. Tokyo Revengers\n6. 365 Days to the Wedding\n7. Bleach\n8. Banished From Hero's Party\n9. Castlevania Nocturne\n10. Hunter X Hunter\n11. Fairy Tail\n12. Tomb Raider\n13. True Beauty\n14. Trillion Game\n15. Reincarnated as a Slime\n16. Blue Lock\n17. The Exclusive Samurai\n18. Days With My Stepsister\n19. Vinland Saga\n20. Alya Sometimes Hides Feelings\n21. Nobody Remember Me\n22. Tower of God\n23. Haikyu\n24. Bye Bye Earth\n25. Black Summoner\n26. Mushoku Tensei\n27. Strongest Magician\n28. Kaiju No. 8\n29. Iceblade Sorcerer\n30. Makeine\n31. Black Clover\n32. Red Ranger\n33. Archdemon's Dilemma\n34. Dr. Stone\n35. Berserk of Gluttony\n36. Reincarnated Aristocrat\n37. One Piece\n38. Record of Ragnarok\n39. Solo Leveling\n40. Sakamoto Days\n41. Hell's Paradise\n42. Tokyo 24th Ward\n43. Wind Breaker\n44. i parry everything\n45. naruto shippuden\n 46. devil may cry\n 47. berserk \n48.  JoJo's Bizarre Adventure \n 49. My Hero Academia \n50. lookism \n51. demon slayer \n52. my dress up darling \n53. death note\n54. I'M Getting Married to a Girl I hate")
-            return
-        except Exception as e:
-            logger.error(f"Error sending anime list: {e}")
+        send_reply(update, context, get_title_lists()['anime'])
+        return
 
     # ============ CONVERSATION HANDLING SECTION ============
 
-    # List of all anime filter names for matching in conversational messages
-    anime_filter_names = list(filters.keys())
-
-    # Sort by length (descending) to match longer titles first
-    anime_filter_names.sort(key=len, reverse=True)
-
     # Check if any anime name appears in the message
     found_anime = None
+    request = None
+    stage_started = time.perf_counter()
 
-    # Common request patterns before anime name
-    request_prefixes = [
-        "i want", "give me", "looking for", "search for",
-        "can i get", "please give", "need", "where is",
-        "how to watch", "link for", "link to"
-    ]
-
-    # Common patterns after anime name
-    request_suffixes = [
-        "anime", "channel", "please", "link", "group",
-        "telegram", "hindi", "english", "episode", "episodes"
-    ]
+    # First check for exact matches of anime names in the text (longest name wins)
+    name_match = get_name_matcher().find_longest(text)
+    if name_match:
+        found_anime = name_match.name
+        logger.info(f"Found anime name '{found_anime}' in conversational message")
 
-    # First check for exact matches of anime names in the text
-    for anime_name in anime_filter_names:
-        if anime_name in text:
-            found_anime = anime_name
-            logger.info(f"Found anime name '{anime_name}' in conversational message")
-            break
-
-    # If no match yet, look for anime name with request patterns
+    # If no match yet, look for a request like "i want [anime_name]" or "[anime_name] channel"
     if not found_anime:
-        for anime_name in anime_filter_names:
-            # Check for patterns like "I want [anime_name]" or "give me [anime_name]"
-            for prefix in request_prefixes:
-                pattern = f"{prefix} {anime_name}"
-                if pattern in text:
-                    found_anime = anime_name
-                    logger.info(f"Found request pattern '{pattern}' in message")
-                    break
-
-            # Check for patterns like "[anime_name] anime" or "[anime_name] channel"
-            if not found_anime:
-                for suffix in request_suffixes:
-                    pattern = f"{anime_name} {suffix}"
-                    if pattern in text:
-                        found_anime = anime_name
-                        logger.info(f"Found request pattern '{pattern}' in message")
-                        break
-
-            if found_anime:
-                break
+        request = request_matcher.match(text)
+        if request and request.title in filters:
+            found_anime = request.title
+            logger.info(f"Found request pattern for '{found_anime}' in message")
+        elif request:
+            logger.info(f"Request for unknown anime '{request.title}' in message")
+    _STAGE_TIMERS['conversation'].time_since(stage_started)
 
     # If we found an anime name in the conversation, use that filter
-    if found_anime and found_anime in filters:
-        filter_data = filters[found_anime]
-        button_links = filter_data.get('button_links', None)
-
-        if button_links:
-            keyboard = []
-            for title, url in button_links.items():
-                keyboard.append([InlineKeyboardButton(title, url=url)])
-
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            try:
-                await update.message.reply_text(
-                    f"Found '{found_anime}' channel for you:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e:
-                logger.error(f"Error replying to message with anime match: {e}")
-                try:
-                    await context.bot.send_message(
-                        chat_id=update.effective_chat.id,
-                        text=f"Found '{found_anime}' channel for you:",
-                        reply_markup=reply_markup
-                    )
-                    return
-                except Exception as e2:
-                    logger.error(f"Failed to send message even with fallback: {e2}")
+    reply = replies.get(found_anime) if found_anime else None
+    if reply and reply.markup:
+        _STAGE_MATCHES['conversation'].inc()
+        send_reply(update, context, reply.found_text, reply_markup=reply.markup)
+        return
 
     # ============ KEYWORD DETECTION SECTION ============
 
-    # Extract potential keywords from the message
-
-    # Check for common keywords within messages
-    keywords = {
-        "pfp": "pfp",
-        "profile": "pfp",
-        "pic": "pfp",
-        "masamune": "masamune kun no revemge",
-        "aot": "attack on titan",
-        "titan": "attack on titan",
-        "naruto": "naruto shippuden",
-        "solo": "solo leveling",
-        "dragon": "dragon ball",
-        "piece": "one piece",
-        "one": "one piece",
-        "samurai": "the exclusive samurai",
-        "angel": "the angel next door",
-        "next": "the angel next door",
-        "slime": "reincarnated as a slime",
-        "stone": "dr. stone",
-        "dr.": "dr. stone",
-        "clover": "black clover",
-        "black": "black clover",
-        "spy": "spy x family",
-        "family": "spy x family",
-        "tokyo 24th ward": "tokyo 24th ward",
-        "tokyo revengers": "tokyo revengers",
-        "married": "i'm getting married to a girl i hate in my class",
-        "girl": "i'm getting married to a girl i hate in my class",
-        "hate": "i'm getting married to a girl i hate in my class",
-        "hunter": "hunter x hunter",
-        "vinland": "vinland saga",
-        "bleach": "bleach",
-        "sakamoto": "sakamoto days",
-        "bye": "bye bye earth",
-        "wind": "wind breaker",
-        "breaker": "wind breaker",
-        "parry": "i parry everything",
-        "everything": "i parry everything",
-        "devil": "devil may cry",
-        "moving": "Howls Moving Castle",
-        "i want": "i want to eat your pancreas",
-        "grave": "grave of the fireflies",
-        "fireflies": "grave of the fireflies",
-        "fire": "grave of the fireflies",
-        "princess": "Princess Mononoke",
-        "Mononoke": "Princess Mononoke",
-        }
-
-    # Check if any keyword is in the message
+    # Check for keyword aliases of the filters within the message
     detected_filter = None
-    for word in text.split():
-        for keyword, filter_name in keywords.items():
-            if keyword in word:  # This allows partial matches
-                detected_filter = filter_name
-                logger.info(f"Detected keyword '{keyword}' in message, showing filter '{filter_name}'")
-                break
-        if detected_filter:
-            break
+    stage_started = time.perf_counter()
+    keyword_match = get_keyword_index().find(text)
+    if keyword_match:
+        keyword, detected_filter = keyword_match
+        logger.info(f"Detected keyword '{keyword}' in message, showing filter '{detected_filter}'")
+    _STAGE_TIMERS['keyword'].time_since(stage_started)
 
     # If we found a keyword match, use that filter
-    if detected_filter and detected_filter in filters:
-        filter_data = filters[detected_filter]
-        content = filter_data['content']
-        button_links = filter_data.get('button_links', None)
+    reply = replies.get(detected_filter) if detected_filter else None
+    if reply and reply.markup:
+        _STAGE_MATCHES['keyword'].inc()
+        send_reply(update, context, reply.found_text, reply_markup=reply.markup)
+        return
 
-        if button_links:
-            keyboard = []
-            for title, url in button_links.items():
-                keyboard.append([InlineKeyboardButton(title, url=url)])
-
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            try:
-                await update.message.reply_text(
-                    f"Found '{detected_filter}' channel for you:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e:
-                logger.error(f"Error replying to message with keyword match: {e}")
-                try:
-                    await context.bot.send_message(
-                        chat_id=update.effective_chat.id,
-                        text=f"Found '{detected_filter}' channel for you:",
-                        reply_markup=reply_markup
-                    )
-                    return
-                except Exception as e2:
-                    logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # ============ DIRECT HANDLERS SECTION ============
-
-    # Direct handler for "naruto shippuden" with channel link
-    if text == "naruto shippuden":
-        keyboard = [[InlineKeyboardButton("Join Naruto Shippuden Hindi Official Channel", url="https://t.me/naruto_shippuden_hindi_by_itachi")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await update.message.reply_text("Naruto Shippuden Hindi Official Channel:", reply_markup=reply_markup)
-            return
-        except Exception as e:
-            logger.error(f"Error replying to message: {e}")
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="Naruto Shippuden Hindi Official Channel:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e2:
-                logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # Direct handler for "married" filter with channel link
-    if text == "married" or text == "girl i hate":
-        keyboard = [[InlineKeyboardButton("Join I'M Getting Married to a Girl I hate channel", url="https://t.me/+bEGR9J6aAFthZDU1")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await update.message.reply_text("I'M Getting Married to a Girl I hate in my class Hindi Official:", reply_markup=reply_markup)
-            return
-        except Exception as e:
-            logger.error(f"Error replying to message: {e}")
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="I'M Getting Married to a Girl I hate in my class Hindi Official:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e2:
-                logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # Direct handler for "wolf king" with channel link
-    if text == "wolf king":
-        keyboard = [[InlineKeyboardButton("Join Wolf King Hindi Official Channel", url="https://t.me/+LSkILVJlHh0zZDdl")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await update.message.reply_text("Wolf King Hindi Official Channel:", reply_markup=reply_markup)
-            return
-        except Exception as e:
-            logger.error(f"Error replying to message: {e}")
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="Wolf King Hindi Official Channel:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e2:
-                logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # Direct handler for "solo leveling" with channel link
-    if text == "solo leveling":
-        keyboard = [[InlineKeyboardButton("Join Solo Leveling Channel", url="https://t.me/+hrOLw2weDKY2YzE1")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await update.message.reply_text("Solo Leveling Channel:", reply_markup=reply_markup)
-            return
-        except Exception as e:
-            logger.error(f"Error replying to message: {e}")
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="Solo Leveling Channel:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e2:
-                logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # Direct handler for "wind breaker" with channel link
-    if text == "wind breaker":
-        keyboard = [[InlineKeyboardButton("Join Wind Breaker Channel", url="https://t.me/+CJBqVPIb7sdhNWJl")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await update.message.reply_text("Wind Breaker Channel:", reply_markup=reply_markup)
-            return
-        except Exception as e:
-            logger.error(f"Error replying to message: {e}")
-            try:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="Wind Breaker Channel:",
-                    reply_markup=reply_markup
-                )
-                return
-            except Exception as e2:
-                logger.error(f"Failed to send message even with fallback: {e2}")
-
-    # ============ POPULAR ANIME FILTERS SECTION ============
-
-    # Direct handler for popular anime filters
-    if text in ["one piece", "naruto shippuden", "masamune kun no revenge", "One punch man", "attack on titan", "Lookism", "solo leveling"]:
-        # Get URLs from filters
-        if text in filters:
-            filter_data = filters[text]
-            button_links = filter_data.get('button_links', None)
-            if button_links:
-                for title, url in button_links.items():
-                    keyboard = [[InlineKeyboardButton(title, url=url)]]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    try:
-                        await update.message.reply_text(f"{title.replace('Join our', '').replace('channel!', '').strip()} Channel:", reply_markup=reply_markup)
-                        return
-                    except Exception as e:
-                        logger.error(f"Error replying to message: {e}")
-                        try:
-                            await context.bot.send_message(
-                                chat_id=update.effective_chat.id,
-                                text=f"{title.replace('Join our', '').replace('channel!', '').strip()} Channel:",
-                                reply_markup=reply_markup
-                            )
-                            return
-                        except Exception as e2:
-                            logger.error(f"Failed to send message even with fallback: {e2}")
+    # ============ DIRECT ROUTES SECTION ============
+
+    # Filters with their own direct reply, and popular anime filters (see 'direct_reply'
+    # and 'popular' in create_all_filters)
+    reply = replies.get(text)
+    if reply and reply.route_markup:
+        _STAGE_MATCHES['route'].inc()
+        send_reply(update, context, reply.route_text, reply_markup=reply.route_markup)
+        return
 
     # ============ EXACT MATCH FILTERS SECTION ============
 
@@ -668,90 +936,87 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         if len(text.split()) <= 1 and len(text) < 2:
             return
 
-        filter_data = filters[text]
-        content = filter_data['content']
-        use_buttons = filter_data.get('use_buttons', False)
-        button_links = filter_data.get('button_links', None)
+        reply = replies[text]
+        _STAGE_MATCHES['exact'].inc()
 
-        if use_buttons:
-            # Split content by lines and create buttons
-            options = [line.strip() for line in content.split('\n') if line.strip()]
-            keyboard = []
-            row = []
-
-            # If we have button links, use them
-            if button_links:
-                for option in options:
-                    if option in button_links:
-                        row.append(InlineKeyboardButton(option, url=button_links[option]))
-                    else:
-                        row.append(InlineKeyboardButton(option, callback_data=f"option_{options.index(option)}"))
-
-                    # Create rows with 2 buttons each
-                    if len(row) == 2:
-                        keyboard.append(row)
-                        row = []
-
-                # Add any remaining buttons
-                if row:
-                    keyboard.append(row)
-            else:
-                # Original button creation logic without URLs
-                for i, option in enumerate(options):
-                    row.append(InlineKeyboardButton(option, callback_data=f"option_{i}"))
-
-                    # Create rows with 2 buttons each
-                    if len(row) == 2 or i == len(options) - 1:
-                        keyboard.append(row)
-                        row = []
-
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            try:
-                await update.message.reply_text(f"Options for '{original_text}':", reply_markup=reply_markup)
-            except Exception as e:
-                logger.error(f"Error replying to message: {e}")
-                try:
-                    await context.bot.send_message(
-                        chat_id=update.effective_chat.id,
-                        text=f"Options for '{original_text}':",
-                        reply_markup=reply_markup
-                    )
-                except Exception as e2:
-                    logger.error(f"Failed to send message even with fallback: {e2}")
+        if reply.options_markup is not None:
+            send_reply(update, context, f"Options for '{original_text}':", reply_markup=reply.options_markup)
         else:
             # Just send the content as text
-            try:
-                await update.message.reply_text(content)
-            except Exception as e:
-                logger.error(f"Error replying with text: {e}")
-                try:
-                    await context.bot.send_message(
-                        chat_id=update.effective_chat.id,
-                        text=content
-                    )
-                except Exception as e2:
-                    logger.error(f"Failed to send text even with fallback: {e2}")
+            send_reply(update, context, reply.content)
         return
 
-async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle errors in the bot."""
-    logger.error(f"Exception while handling an update: {context.error}")
-
-    # Log the error before we do anything else, so we can see it even if something breaks
-    logger.error(msg="Exception while handling an update:", exc_info=context.error)
+    # ============ FUZZY MATCH SECTION ============
+
+    # Last resort for misspelled titles like "attak on titen" or "haikyu"
+    stage_started = time.perf_counter()
+    fuzzy_match = get_fuzzy_index().search(
+        request.title if request else text,
+        max_candidates=FUZZY_MAX_CANDIDATES,
+        time_budget=FUZZY_TIME_BUDGET
+    )
+    _STAGE_TIMERS['fuzzy'].time_since(stage_started)
+    reply = replies.get(fuzzy_match.name) if fuzzy_match else None
+    if reply and reply.markup:
+        _STAGE_MATCHES['fuzzy'].inc()
+        logger.info(f"Fuzzy matched '{fuzzy_match.term}' ({fuzzy_match.distance} edits) for filter '{fuzzy_match.name}'")
+        send_reply(update, context, reply.suggest_text, reply_markup=reply.markup)
+    else:
+        _STAGE_MATCHES['none'].inc()
 
-    # Try to notify the user that something went wrong
-    if update and update.effective_chat:
+async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle errors in the bot; the admin gets a periodic summary instead of one message per error."""
+    HANDLER_ERRORS.inc()
+    chat = update.effective_chat if isinstance(update, Update) else None
+
+    # Log the error before we do anything else, so we can see it even if something breaks.
+    # The full traceback only the first time it shows up in the current summary window
+    if error_reporter.record(context.error, chat.id if chat else None):
+        logger.error(msg="Exception while handling an update:", exc_info=context.error)
+    else:
+        logger.error(f"Exception while handling an update (repeated): {context.error}")
+
+    # Tell the chat that something went wrong, unless it was told recently
+    if chat and error_reporter.allow_chat_notice(chat.id):
+        send_reply(update, context, "Sorry, something went wrong. Please try again later.")
+
+def format_names(names, others=0):
+    """'A', 'A and B', 'A, B and C', or the names and how many others"""
+    if others:
+        return f"{', '.join(names)} and {others} others"
+    if len(names) == 1:
+        return names[0]
+    return f"{', '.join(names[:-1])} and {names[-1]}"
+
+async def send_welcome(bot, chat_id, names, others, replaces):
+    """Welcome names and others more members in chat_id with one message, replacing the previous welcome if given"""
+    if replaces is not None:
         try:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text="Sorry, something went wrong. Please try again later."
-            )
+            await replaces.delete()
         except Exception as e:
-            logger.error(f"Failed to send error message: {e}")
+            logger.error(f"Error deleting previous welcome message: {e}")
+    welcome_text = (
+        f"👋 Welcome {format_names(names, others)}!\n\n"
+        f"To see all available anime channels, type:\n"
+        f"• /anime - Shows all anime channels\n"
+        f"• /start - Shows welcome message\n"
+        f"• /help - Shows help information\n\n"
+        f"You can also type any anime name (like 'solo leveling' or 'attack on titan') "
+        f"to get a direct link to that channel!"
+    )
+    try:
+        return await send_to_chat(bot, chat_id, welcome_text, priority=PRIORITY_WELCOME)
+    except Exception:
+        # Already logged by the outbound scheduler
+        return None
+
+# Joins are welcomed together, one message per burst (WELCOME_WINDOW / WELCOME_COOLDOWN)
+welcome_batcher = WelcomeBatcher(send_welcome, window=WELCOME_WINDOW, cooldown=WELCOME_COOLDOWN)
 
+@timed(HANDLER_LATENCY.labels('welcome_new_member'))
 async def welcome_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle new member joins"""
+    names = []
     for new_member in update.message.new_chat_members:
         if new_member.id == context.bot.id:
             # Bot was added to a group
@@ -764,78 +1029,71 @@ async def welcome_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 "You can also type any anime name (like 'solo leveling' or 'attack on titan') "
                 "to get a direct link to that channel!"
             )
-            await update.message.reply_text(welcome_text)
+            send_reply(update, context, welcome_text, priority=PRIORITY_WELCOME)
         else:
-            # New user joined the group
-            welcome_text = (
-                f"👋 Welcome {new_member.first_name}!\n\n"
-                f"To see all available anime channels, type:\n"
-                f"• /anime - Shows all anime channels\n"
-                f"• /start - Shows welcome message\n"
-                f"• /help - Shows help information\n\n"
-                f"You can also type any anime name (like 'solo leveling' or 'attack on titan') "
-                f"to get a direct link to that channel!"
-            )
-            await update.message.reply_text(welcome_text)
-
+            # New user joined the group, welcomed together with everyone joining around now
+            names.append(new_member.first_name)
+    if names:
+        welcome_batcher.add(context.bot, update.effective_chat.id, names)
+
+async def track_chat_members(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep the admin cache current when members are promoted, demoted or leave"""
+    admin_cache.member_updated(update.chat_member or update.my_chat_member)
+    if update.my_chat_member is not None:
+        # The bot itself was promoted or demoted
+        new_member = update.my_chat_member.new_chat_member
+        can_delete = new_member.status == 'creator' or getattr(new_member, 'can_delete_messages', False)
+        ad_deletions.permission_changed(update.my_chat_member.chat.id, can_delete)
+
+@timed(HANDLER_LATENCY.labels('checkall_command'))
 async def checkall_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /checkall command - shows all filters with links"""
     # Check if command is used in a group
     if update.effective_chat.type not in ['group', 'supergroup']:
-        await update.message.reply_text("This command can only be used in groups!")
+        send_reply(update, context, "This command can only be used in groups!", priority=PRIORITY_COMMAND)
         return
 
-    # Get the chat member who sent the command
+    # Check if the user who sent the command is the group owner or an admin
     user = update.effective_user
-    chat_member = await context.bot.get_chat_member(update.effective_chat.id, user.id)
-
-    # Check if user is the group owner
-    if chat_member.status not in ['creator', 'administrator']:
-        await update.message.reply_text("Only group owners and administrators can use this command!")
+    if not await admin_cache.is_admin(context.bot, update.effective_chat.id, user.id):
+        send_reply(update, context, "Only group owners and administrators can use this command!", priority=PRIORITY_COMMAND)
         return
 
-    # Get all filters
-    filters = load_filters()
-
-    # Create message with all filters and their links
-    message = "📋 All Available Filters and Links:\n\n"
-
-    # Add each filter with its link
-    for filter_name, filter_data in filters.items():
-        if filter_data.get('button_links'):
-            for title, url in filter_data['button_links'].items():
-                message += f"• {filter_name.title()}\n  Link: {url}\n\n"
-
-    # Split message into chunks if it's too long
-    max_length = 4000
-    if len(message) > max_length:
-        chunks = [message[i:i + max_length] for i in range(0, len(message), max_length)]
-        for chunk in chunks:
-            await update.message.reply_text(chunk)
-    else:
-        await update.message.reply_text(message)
+    # Send the first page, the buttons under it flip through the others
+    text, markup = get_checkall_pages()[0]
+    send_reply(update, context, text, reply_markup=markup, priority=PRIORITY_COMMAND)
 
 async def handle_sticker(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle sticker messages"""
     # Function disabled - no longer checking channel membership for stickers
     pass
 
+@timed(HANDLER_LATENCY.labels('movie_command'))
 async def movie_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send the anime movie list when the command /movie is issued."""
-    movie_list_text = "All Anime Movies Available:\n1. Howls Moving Castle (2004)\n2. Grave of the Fireflies\n3. I want to eat your pancreas\n4. Princess Mononoke (1997)\n5. black clover: sword of the wizard king\n6. your name(kimi no nawa)\n7. weathering with you\n8. A Silent Voice\n9. Over The Sky\n10. 5cm per second\n11. suzume no tojimari"
-
-    await update.message.reply_text(movie_list_text)
+    send_reply(update, context, get_title_lists()['movie'], priority=PRIORITY_COMMAND)
 
 async def main() -> None:
     """Start the bot."""
-    # Initialize filters
-    init_filters()
-
-    # Create all channel filters
-    create_all_filters()
-
-    # Create the Application and pass it your bot's token
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Initialize filters and create all channel filters in one write
+    with catalog.batch():
+        init_filters()
+        create_all_filters()
+
+    # Allow `kill -HUP` to force a reload of filters.json (not available on Windows)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: catalog.request_reload())
+
+    # Create the Application and pass it your bot's token; Bot API calls are timed
+    # for the metrics (same pool size as the builder's default request)
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .request(MetricsHTTPXRequest(connection_pool_size=256))
+        .update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE))
+        .concurrent_updates(ChatOrderedUpdateProcessor(CONCURRENT_UPDATES, UPDATE_QUEUE_SIZE))
+        .build()
+    )
 
     # Commands
     application.add_handler(CommandHandler("start", start))
@@ -849,6 +1107,12 @@ async def main() -> None:
     # Callback query handler for buttons
     application.add_handler(CallbackQueryHandler(button_callback))
 
+    # "@bot <title>" from any chat
+    application.add_handler(InlineQueryHandler(inline_query))
+
+    # Admin promotions/demotions, for the admin cache
+    application.add_handler(ChatMemberHandler(track_chat_members, ChatMemberHandler.ANY_CHAT_MEMBER))
+
     # Register new member handler
     application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, welcome_new_member))
 
@@ -864,21 +1128,83 @@ async def main() -> None:
     # Start the Bot
     await application.initialize()
     await application.start()
-    await application.updater.start_polling()
+    webhook_receiver = None
+    if BOT_MODE == 'webhook':
+        webhook_receiver = await start_webhook(application)
+    else:
+        # Chat member updates are only delivered when asked for explicitly
+        await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+    logger.info(f"Bot started ({BOT_MODE}).")
 
-    logger.info("Bot started.")
+    # Optional metrics endpoint and periodic dump
+    metrics_server = None
+    metrics_dump_task = None
+    if METRICS_PORT:
+        metrics_server = await registry.serve(METRICS_HOST, METRICS_PORT)
+    if METRICS_FILE:
+        metrics_dump_task = asyncio.create_task(dump_metrics_periodically())
+    error_report_task = asyncio.create_task(report_errors_periodically(application.bot))
 
     # Run indefinitely until interrupted
     try:
         while True:
             await asyncio.sleep(3600)  # Check every hour
+            # Fold the filters change log into a fresh snapshot, off the event loop
+            await asyncio.to_thread(catalog.compact)
+            await chat_settings.flush()
     except (KeyboardInterrupt, SystemExit):
         logger.info("Bot stopping...")
     finally:
         # Clean shutdown
+        error_report_task.cancel()
+        if metrics_dump_task:
+            metrics_dump_task.cancel()
+            registry.dump(METRICS_FILE)
+        if metrics_server:
+            metrics_server.close()
+        if webhook_receiver:
+            await webhook_receiver.stop()
+        elif application.updater.running:
+            await application.updater.stop()
+        await ad_deletions.close()
+        await chat_settings.close()
+        await outbound.close()
         await application.stop()
 
+async def start_webhook(application):
+    """Start the webhook receiver and register WEBHOOK_URL with Telegram"""
+    secret_token = WEBHOOK_SECRET
+    if not secret_token:
+        # Only Telegram learns this one, through set_webhook below
+        secret_token = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET is not set, using a random secret token for this run")
+    receiver = WebhookReceiver(
+        application,
+        path=WEBHOOK_PATH,
+        secret_token=secret_token,
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        max_backlog=UPDATE_QUEUE_SIZE
+    )
+    await receiver.start()
+    if WEBHOOK_URL:
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES
+        )
+        logger.info(f"Registered webhook {WEBHOOK_URL}")
+    else:
+        logger.warning("WEBHOOK_URL is not set, Telegram will not deliver updates to this receiver")
+    return receiver
+
 def create_all_filters():
+    """Create all channel filters with a single write to filters.json"""
+    with catalog.batch():
+        seed_all_filters()
+
+def seed_all_filters():
     """Create all channel filters in a separate function for better organization.
 
     Filters are organized alphabetically (A-Z) for easier maintenance.
@@ -886,11 +1212,12 @@ def create_all_filters():
     """
     # ================= MAIN FILTER COLLECTIONS =================
 
-    # Anime list - Shows all available anime channels
+    # Anime list - Shows all available anime channels, generated from the filters below
     add_filter(
         "anime list",
-        "All Anime/Manga Channels Available:\n1. Dragon Ball Diama\n2. The Angel Next Door\n3. Dandadan\n4. Code Geass\n5. Tokyo Revengers\n6. 365 Days to the Wedding\n7. Bleach\n8. Banished From Hero's Party\n9. Castlevania Nocturne\n10. Hunter X Hunter\n11. Fairy Tail\n12. Tomb Raider\n13. True Beauty\n14. Trillion Game\n15. Reincarnated as a Slime\n16. Blue Lock\n17. The Exclusive Samurai\n18. Days With My Stepsister\n19. Vinland Saga\n20. Alya Sometimes Hides Feelings\n21. Nobody Remember Me\n22. Tower of God\n23. Haikyuu\n24. Bye Bye Earth\n25. Black Summoner\n26. Mushoku Tensei\n27. Strongest Magician\n28. Kaiju No. 8\n29. Iceblade Sorcerer\n30. Makeine\n31. Black Clover\n32. Red Ranger\n33. Archdemon's Dilemma\n34. Dr. Stone\n35. Berserk of Gluttony\n36. Reincarnated Aristocrat\n37. One Piece\n38. Record of Ragnarok\n39. Solo Leveling\n40. Sakamoto Days\n41. Hell's Paradise\n42. Tokyo 24th Ward\n43. Wind Breaker\n44. i parry everything\n45. naruto shippuden\n46. devil may cry\n47. berserk\n48.  JoJo's Bizarre Adventure \n49. My Hero Academia \n50. lookism \n51. demon slayer \n52. my dress up darling \n53. death note\n54. I'M Getting Married to a Girl I hate",
-        use_buttons=False
+        TITLE_LIST_HEADERS['anime'],
+        use_buttons=False,
+        title_list="anime"
     )
 
     # Channels - Shows all main Hindi Official channels
@@ -917,7 +1244,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our 365 Days to the Wedding channel!": "https://t.me/+yMsIsFN_LhFkNzhl"
-        }
+        },
+        category="anime",
+        display_name="365 Days to the Wedding",
+        sort_order=6
     )
 
     # Alya Sometimes Hides Her Feelings in Russian (with alternative name)
@@ -936,6 +1266,31 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Alya Sometimes Hides Her Feelings in Russian channel!": "https://t.me/+tHv3vabltudkNzU9"
+        },
+        category="anime",
+        display_name="Alya Sometimes Hides Her Feelings",
+        sort_order=20
+    )
+
+    # An Archdemon's Dilemma: How to Love Your Elf Bride (with alternative name)
+    add_filter(
+        "an archdemon's dilemma",
+        "Join our An Archdemon's Dilemma: How to Love Your Elf Bride channel!",
+        use_buttons=True,
+        button_links={
+            "Join our An Archdemon's Dilemma: How to Love Your Elf Bride channel!": "https://t.me/+2YyGGqDcPfIwMGNl"
+        },
+        category="anime",
+        display_name="Archdemon's Dilemma",
+        sort_order=33
+    )
+
+    add_filter(
+        "archdemon's dilemma",
+        "Join our An Archdemon's Dilemma: How to Love Your Elf Bride channel!",
+        use_buttons=True,
+        button_links={
+            "Join our An Archdemon's Dilemma: How to Love Your Elf Bride channel!": "https://t.me/+2YyGGqDcPfIwMGNl"
         }
     )
 
@@ -946,7 +1301,12 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Masamune kun no revenge Hindi⚜️": "https://t.me/masamune_kuns_revenge_hindi_01"
-        }
+        },
+        aliases=["masamune"],
+        popular=True,
+        category="anime",
+        display_name="Masamune Kun no Revenge",
+        sort_order=55
     )
 
     # masamune kun no revenge (other worda)
@@ -966,7 +1326,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "The Gorilla God’s Go-To Girl": "https://t.me/+L_QlfKP7FWdiNTll"
-        }
+        },
+        category="anime",
+        display_name="The Gorilla God’s Go-To Girl",
+        sort_order=60
     )
 
     # The Gorilla God’s Go-To Girl
@@ -986,7 +1349,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Lookism Hindi⚜️": "https://t.me/lookismhindidubofficial"
-        }
+        },
+        category="anime",
+        display_name="Lookism",
+        sort_order=50
     )
 
     #Spy X Family
@@ -996,7 +1362,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Spy X Family Hindi⚜️": "https://t.me/+VdKezSBeWlhiOTZl"
-        }
+        },
+        aliases=["spy", "family"],
+        category="anime",
+        display_name="Spy x Family",
+        sort_order=56
     )
 
     #Spy X Family (other worda)
@@ -1037,7 +1407,12 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Attack On Titan Hindi⚜️": "https://t.me/+rIKUUyTYlo8wNGM1"
-        }
+        },
+        aliases=["aot", "titan"],
+        popular=True,
+        category="anime",
+        display_name="Attack on Titan",
+        sort_order=58
     )
 
     # Banished From Hero's Party
@@ -1047,7 +1422,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Banished From The Hero's Party channel!": "https://t.me/+9r-mcECjMkU4M2M1"
-        }
+        },
+        category="anime",
+        display_name="Banished From the Hero's Party",
+        sort_order=8
     )
 
     # Berserk of Gluttony
@@ -1057,7 +1435,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Berserk of Gluttony channel!": "https://t.me/+6PovWxfhmr80MGRl"
-        }
+        },
+        category="anime",
+        display_name="Berserk of Gluttony",
+        sort_order=35
     )
 
     add_filter(
@@ -1066,7 +1447,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Berserk channel!": "https://t.me/+6PovWxfhmr80MGRl"
-        }
+        },
+        category="anime",
+        display_name="Berserk",
+        sort_order=47
     )
 
     # Black Clover
@@ -1077,7 +1461,11 @@ def create_all_filters():
         button_links={
             "⚜️Black Clover Hindi⚜️": "https://t.me/+ebqfkhHMwKZhZjY1",
             "⚜️Black Clover English⚜️": "https://t.me/+PQTUS0aP67czMzA1"
-        }
+        },
+        aliases=["clover", "black"],
+        category="anime",
+        display_name="Black Clover",
+        sort_order=31
     )
 
     #Boruto
@@ -1087,7 +1475,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Boruto English⚜️": "https://t.me/+72_6hOFG9_s4MWJl"
-        }
+        },
+        category="anime",
+        display_name="Boruto",
+        sort_order=57
     )
 
     # Black Summoner
@@ -1097,7 +1488,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Black Summoner⚜️": "https://t.me/+Dxi8FhL7OWM0YzQ1"
-        }
+        },
+        category="anime",
+        display_name="Black Summoner",
+        sort_order=25
     )
 
     # Bleach
@@ -1107,7 +1501,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Bleach channel!": "https://t.me/+cbkoLK1BMXllODg1"
-        }
+        },
+        aliases=["bleach"],
+        category="anime",
+        display_name="Bleach",
+        sort_order=7
     )
 
     # Blue Lock
@@ -1117,7 +1515,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Blue Lock channel!": "https://t.me/+mlb_OIhPtj40ODc9"
-        }
+        },
+        category="anime",
+        display_name="Blue Lock",
+        sort_order=16
     )
 
     # Bye Bye Earth
@@ -1127,7 +1528,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Bye Bye Earth channel!": "https://t.me/+Dxi8FhL7OWM0YzQ1"
-        }
+        },
+        aliases=["bye"],
+        category="anime",
+        display_name="Bye Bye Earth",
+        sort_order=24
     )
 
     # Castlevania Nocturne
@@ -1137,7 +1542,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Castlevania Nocturne channel!": "https://t.me/+jxms8T753JgzNzRl"
-        }
+        },
+        category="anime",
+        display_name="Castlevania Nocturne",
+        sort_order=9
     )
 
     # Code Geass
@@ -1147,7 +1555,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Code Geass channel!": "https://t.me/+kVBhy_IRNVBjZjRl"
-        }
+        },
+        category="anime",
+        display_name="Code Geass",
+        sort_order=4
     )
 
     # Dandadan
@@ -1157,7 +1568,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Dandadan channel!": "https://t.me/+ilLS_2IHOsplZTll"
-        }
+        },
+        category="anime",
+        display_name="Dandadan",
+        sort_order=3
     )
 
     # Days With My Stepsister
@@ -1167,7 +1581,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Days With My Stepsister channel!": "https://t.me/+uzmJv4FcKXI2MWQ1"
-        }
+        },
+        category="anime",
+        display_name="Days With My Stepsister",
+        sort_order=18
     )
 
     # Death Note
@@ -1177,7 +1594,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Death Note!": "https://t.me/+yk39P6z_ejE3NWY1"
-        }
+        },
+        category="anime",
+        display_name="Death Note",
+        sort_order=53
     )
 
     # Demon Slayer
@@ -1187,7 +1607,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Demon Slayer!": "https://t.me/demon_slayer_by_itachi"
-        }
+        },
+        category="anime",
+        display_name="Demon Slayer",
+        sort_order=51
     )
 
     # Dr. Stone (with alternative name)
@@ -1197,7 +1620,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Dr. Stone channel!": "https://t.me/+to7vXXj2seJkNzA1"
-        }
+        },
+        aliases=["stone", "dr."],
+        category="anime",
+        display_name="Dr. Stone",
+        sort_order=34
     )
 
     add_filter(
@@ -1216,7 +1643,8 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Dragon Ball Diama channel!": "https://t.me/+1gh_jaECTH0zMGZl"
-        }
+        },
+        aliases=["dragon"]
     )
 
     add_filter(
@@ -1225,7 +1653,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Dragon Ball Diama channel!": "https://t.me/+1gh_jaECTH0zMGZl"
-        }
+        },
+        category="anime",
+        display_name="Dragon Ball Diama",
+        sort_order=1
     )
 
     # devil may cry
@@ -1235,7 +1666,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join Devil may cry channel!": "https://t.me/+1hsuaPkU0R4xNzll"
-        }
+        },
+        aliases=["devil"],
+        category="anime",
+        display_name="Devil May Cry",
+        sort_order=46
     )
 
     # Fairy Tail
@@ -1245,7 +1680,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Fairy Tail channel!": "https://t.me/+PQuJwoIu5FtjZDBl"
-        }
+        },
+        category="anime",
+        display_name="Fairy Tail",
+        sort_order=11
     )
 
     # Haikyuu
@@ -1256,7 +1694,10 @@ def create_all_filters():
         button_links={
             "⚜️Haikyuu Hindi⚜️": "https://t.me/+R71oa-rUAfpkMTc1",
             "⚜️Haikyuu English⚜️": "https://t.me/+j0vfD_JJ5ZhjOGQ9"
-        }
+        },
+        category="anime",
+        display_name="Haikyuu",
+        sort_order=23
     )
 
     # Hell's Paradise
@@ -1266,7 +1707,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Hell's Paradise channel!": "https://t.me/+ZFrN0l7LWxZiZjI1"
-        }
+        },
+        category="anime",
+        display_name="Hell's Paradise",
+        sort_order=41
     )
 
 
@@ -1277,7 +1721,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Hunter X Hunter channel!": "https://t.me/+zYqe7HbwomNhN2Jl"
-        }
+        },
+        aliases=["hunter"],
+        category="anime",
+        display_name="Hunter X Hunter",
+        sort_order=10
     )
 
     add_filter(
@@ -1296,7 +1744,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our i parry everything": "https://t.me/+3TLW2IsnkoUxZjRl"
-        }
+        },
+        aliases=["parry", "everything"],
+        category="anime",
+        display_name="I Parry Everything",
+        sort_order=44
     )
 
     # I'M Getting Married to a Girl I hate (with multiple alternative names)
@@ -1306,7 +1758,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️I'M Getting Married to a Girl I hate in my class⚜️": "https://t.me/+bEGR9J6aAFthZDU1"
-        }
+        },
+        aliases=["married", "girl", "hate"],
+        category="anime",
+        display_name="I'm Getting Married to a Girl I Hate in My Class",
+        sort_order=54
     )
 
     add_filter(
@@ -1315,6 +1771,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️I'M Getting Married to a Girl I hate in my class⚜️": "https://t.me/+bEGR9J6aAFthZDU1"
+        },
+        direct_reply={
+            "text": "I'M Getting Married to a Girl I hate in my class Hindi Official:",
+            "button_links": {"Join I'M Getting Married to a Girl I hate channel": "https://t.me/+bEGR9J6aAFthZDU1"}
         }
     )
 
@@ -1324,6 +1784,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️I'M Getting Married to a Girl I hate in my class⚜️": "https://t.me/+bEGR9J6aAFthZDU1"
+        },
+        direct_reply={
+            "text": "I'M Getting Married to a Girl I hate in my class Hindi Official:",
+            "button_links": {"Join I'M Getting Married to a Girl I hate channel": "https://t.me/+bEGR9J6aAFthZDU1"}
         }
     )
 
@@ -1334,7 +1798,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our JoJo's Bizarre Adventure!": "https://t.me/+CDIm-d1NgzoxYzE1"
-        }
+        },
+        category="anime",
+        display_name="JoJo's Bizarre Adventure",
+        sort_order=48
     )
 
     # Iceblade Sorcerer (with alternative name)
@@ -1353,7 +1820,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our The Iceblade Sorcerer Shall Rule the World channel!": "https://t.me/+vdcSA2aiEsw1ZmM9"
-        }
+        },
+        category="anime",
+        display_name="Iceblade Sorcerer",
+        sort_order=29
     )
 
     # Kaiju No. 8 (with alternative spelling)
@@ -1372,7 +1842,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Kaiju No. 8 channel!": "https://t.me/+xSWUiodOBN0zYTE1"
-        }
+        },
+        category="anime",
+        display_name="Kaiju No. 8",
+        sort_order=28
     )
 
     # Lookism
@@ -1382,7 +1855,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Lookism!": "https://t.me/lookismhindidubofficial"
-        }
+        },
+        popular=True,
+        category="anime",
+        display_name="Lookism",
+        sort_order=50
     )
 
     # Makeine
@@ -1392,7 +1869,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Makeine: Too Many Losing Heroines channel!": "https://t.me/+kpkv8_eHksE4NTA1"
-        }
+        },
+        category="anime",
+        display_name="Makeine",
+        sort_order=30
     )
 
 # My Hero Academia
@@ -1402,7 +1882,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our My Hero Academia!": "https://t.me/+XvXvc1zUBYY2ZmU1"
-        }
+        },
+        category="anime",
+        display_name="My Hero Academia",
+        sort_order=49
     )
     # My Dress Up Darling
     add_filter(
@@ -1411,7 +1894,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our My Dress Up Darling!": "https://t.me/+tUqeksNR6jRkOWI1"
-        }
+        },
+        category="anime",
+        display_name="My Dress Up Darling",
+        sort_order=52
     )
 
     # Mushoku Tensei
@@ -1421,7 +1907,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Mushoku Tensei Jobless Reincarnation channel!": "https://t.me/+kuLg8hDnGjxkYTFl"
-        }
+        },
+        category="anime",
+        display_name="Mushoku Tensei",
+        sort_order=26
     )
 
     # Naruto Shippuden
@@ -1431,7 +1920,15 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join Naruto Shippuden Hindi Official Channel": "https://t.me/naruto_shippuden_hindi_by_itachi"
-        }
+        },
+        aliases=["naruto"],
+        direct_reply={
+            "text": "Naruto Shippuden Hindi Official Channel:",
+            "button_links": {"Join Naruto Shippuden Hindi Official Channel": "https://t.me/naruto_shippuden_hindi_by_itachi"}
+        },
+        category="anime",
+        display_name="Naruto Shippuden",
+        sort_order=45
     )
 
     # Nobody Remember Me (with alternative name)
@@ -1450,7 +1947,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Why Does Nobody Remember Me in This World channel!": "https://t.me/+fQZWeXpsm5wxODJl"
-        }
+        },
+        category="anime",
+        display_name="Nobody Remember Me",
+        sort_order=21
     )
 
     # One Piece
@@ -1460,7 +1960,12 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our One Piece channel!": "https://t.me/+lSCWH3o7N181MWU1"
-        }
+        },
+        aliases=["piece", "one"],
+        popular=True,
+        category="anime",
+        display_name="One Piece",
+        sort_order=37
     )
 
     #pfp comples
@@ -1470,7 +1975,8 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our pfp channel!": "https://t.me/+DY5UnChCRiE3MDNl"
-        }
+        },
+        aliases=["pfp", "profile", "pic"]
     )
 
     # Record of Ragnarok
@@ -1480,7 +1986,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Record of Ragnarok channel!": "https://t.me/+lrHocYkUDRA1ZmQ9"
-        }
+        },
+        category="anime",
+        display_name="Record of Ragnarok",
+        sort_order=38
     )
 
     # Reincarnated Aristocrat
@@ -1490,7 +1999,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Reincarnated Aristocrat channel!": "https://t.me/+_xR_UDiTR-hkNjNl"
-        }
+        },
+        category="anime",
+        display_name="Reincarnated Aristocrat",
+        sort_order=36
     )
 
     # Reincarnated as a Slime (with alternative name)
@@ -1509,7 +2021,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our That Time I Got Reincarnated as a Slime channel!": "https://t.me/+ktyGhQqUEbA2MzY1"
-        }
+        },
+        aliases=["slime"],
+        category="anime",
+        display_name="Reincarnated as a Slime",
+        sort_order=15
     )
 
     # Red Ranger (with alternative name)
@@ -1528,7 +2044,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our The Red Ranger Becomes an Adventurer in Another World channel!": "https://t.me/+vLnY2TPESNpjYjU1"
-        }
+        },
+        category="anime",
+        display_name="Red Ranger",
+        sort_order=32
     )
 
     # Solo Leveling (with alternative names)
@@ -1539,7 +2058,15 @@ def create_all_filters():
         button_links={
             "⚜️Solo Leveling Hindi⚜️": "https://t.me/+hrOLw2weDKY2YzE1",
             "⚜️Solo Leveling English sub⚜️": "https://t.me/Solo_leveling_english_sub_itachi"
-        }
+        },
+        aliases=["solo"],
+        direct_reply={
+            "text": "Solo Leveling Channel:",
+            "button_links": {"Join Solo Leveling Channel": "https://t.me/+hrOLw2weDKY2YzE1"}
+        },
+        category="anime",
+        display_name="Solo Leveling",
+        sort_order=39
     )
 
     add_filter(
@@ -1569,7 +2096,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our sakamoto days!": "https://t.me/+pzbmkUAsJ3NkYzdl"
-        }
+        },
+        aliases=["sakamoto"],
+        category="anime",
+        display_name="Sakamoto Days",
+        sort_order=40
     )
 
     # sakamoto days
@@ -1579,7 +2110,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Horimiya⚜️": "https://t.me/+eGAtcRyUyIhmNTY1"
-        }
+        },
+        category="anime",
+        display_name="Horimiya",
+        sort_order=61
     )
 
     # Strongest Magician (with alternative name)
@@ -1598,7 +2132,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our The Strongest Magician in the Demon Lord's Army Was a Human channel!": "https://t.me/+3XsNQbIQn7ViN2Nl"
-        }
+        },
+        category="anime",
+        display_name="Strongest Magician",
+        sort_order=27
     )
 
     # The Angel Next Door
@@ -1608,7 +2145,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join The Angel Next Door Spoils Me Rotten channel!": "https://t.me/+MY2RlYAOSJ41NmJl"
-        }
+        },
+        aliases=["angel", "next"],
+        category="anime",
+        display_name="The Angel Next Door",
+        sort_order=2
     )
 
     # The Exclusive Samurai
@@ -1618,7 +2159,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our The Exclusive Samurai channel!": "https://t.me/+cOWAompwXTc3ZGU1"
-        }
+        },
+        aliases=["samurai"],
+        category="anime",
+        display_name="The Exclusive Samurai",
+        sort_order=17
     )
 
     # Tokyo 24th Ward
@@ -1628,7 +2173,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Tokyo 24th Ward Hindi Official channel!": "https://t.me/+ShzCsWRvCvcwMjFl"
-        }
+        },
+        aliases=["tokyo 24th ward"],
+        category="anime",
+        display_name="Tokyo 24th Ward",
+        sort_order=42
     )
 
     # Tokyo Revengers
@@ -1638,7 +2187,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Tokyo Revengers channel!": "https://t.me/+DlAvoUkq-fc1NjZl"
-        }
+        },
+        aliases=["tokyo revengers"],
+        category="anime",
+        display_name="Tokyo Revengers",
+        sort_order=5
     )
 
     # Tomb Raider
@@ -1648,7 +2201,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Tomb Raider channel!": "https://t.me/+8Uk6uI1ALpU5ZWJl"
-        }
+        },
+        category="anime",
+        display_name="Tomb Raider",
+        sort_order=12
     )
 
     # Tower of God
@@ -1658,7 +2214,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Tower of God channel!": "https://t.me/+L8xLBF_ld7BlZTM1"
-        }
+        },
+        category="anime",
+        display_name="Tower of God",
+        sort_order=22
     )
 
     # Trillion Game
@@ -1668,7 +2227,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Trillion Game channel!": "https://t.me/+0BhCMko4oGg0ZmFl"
-        }
+        },
+        category="anime",
+        display_name="Trillion Game",
+        sort_order=14
     )
 
     # True Beauty
@@ -1678,7 +2240,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our True Beauty channel!": "https://t.me/+8RT0IpMY7p5mOWE1"
-        }
+        },
+        category="anime",
+        display_name="True Beauty",
+        sort_order=13
     )
 
     # Vinland Saga
@@ -1688,7 +2253,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Vinland Saga channel!": "https://t.me/+tXDuwMgFK-RmOGFl"
-        }
+        },
+        aliases=["vinland"],
+        category="anime",
+        display_name="Vinland Saga",
+        sort_order=19
     )
 
     # wind breaker
@@ -1699,7 +2268,15 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our wind breaker channel!": "https://t.me/+CJBqVPIb7sdhNWJl"
-        }
+        },
+        aliases=["wind", "breaker"],
+        direct_reply={
+            "text": "Wind Breaker Channel:",
+            "button_links": {"Join Wind Breaker Channel": "https://t.me/+CJBqVPIb7sdhNWJl"}
+        },
+        category="anime",
+        display_name="Wind Breaker",
+        sort_order=43
     )
 
     # Wolf King
@@ -1709,7 +2286,14 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Wolf King channel!": "https://t.me/+LSkILVJlHh0zZDdl"
-        }
+        },
+        direct_reply={
+            "text": "Wolf King Hindi Official Channel:",
+            "button_links": {"Join Wolf King Hindi Official Channel": "https://t.me/+LSkILVJlHh0zZDdl"}
+        },
+        category="anime",
+        display_name="Wolf King",
+        sort_order=59
     )
 
 #classroom of the elite
@@ -1719,7 +2303,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️classroom of the elite⚜️": "https://t.me/+k6-pC-WerIpjYTM9"
-        }
+        },
+        category="anime",
+        display_name="Classroom of the Elite",
+        sort_order=62
     )
 
     add_filter(
@@ -1738,7 +2325,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️Kaguya-sama: Love Is War⚜️": "https://t.me/+sKiOZDL1aGo1YjA1"
-        }
+        },
+        category="anime",
+        display_name="Kaguya-sama: Love Is War",
+        sort_order=63
     )
 
     add_filter(
@@ -1766,7 +2356,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️mob psycho 100⚜️": "https://t.me/+_h43S2hlfO1jMjQ9"
-        }
+        },
+        category="anime",
+        display_name="Mob Psycho 100",
+        sort_order=64
     )
 
     add_filter(
@@ -1796,7 +2389,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Howls Moving Castle!": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/67"
-        }
+        },
+        aliases=["moving"],
+        category="movie",
+        display_name="Howls Moving Castle (2004)",
+        sort_order=1
     )
 
     # grave of thr fireflies
@@ -1806,7 +2403,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
            "Join our grave of thr fireflies!": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/72"
-        }
+        },
+        aliases=["grave", "fireflies", "fire"],
+        category="movie",
+        display_name="Grave of the Fireflies",
+        sort_order=2
     )
 
     # I want to eat your pancreas
@@ -1816,7 +2417,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our I want to eat your pancreas!": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/27"
-        }
+        },
+        category="movie",
+        display_name="I Want to Eat Your Pancreas",
+        sort_order=3
     )
 
     # Princess Mononoke
@@ -1826,7 +2430,11 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our Princess Mononoke!": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/70"
-        }
+        },
+        aliases=["princess", "mononoke"],
+        category="movie",
+        display_name="Princess Mononoke (1997)",
+        sort_order=4
     )
 
     # Your name
@@ -1836,7 +2444,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "Join our your name!": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/3"
-        }
+        },
+        category="movie",
+        display_name="Your Name (Kimi no Na wa)",
+        sort_order=5
     )
 
     # Chhota bheem all movies
@@ -1848,7 +2459,10 @@ def create_all_filters():
             "watch: chhota bheem master of sholin": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/4",
             "watch: chhota bheem and the shinobi secret": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/5",
             "watch: chhota bheem and the rise of kirmada": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/6"
-        }
+        },
+        category="movie",
+        display_name="Chhota Bheem Movies",
+        sort_order=12
     )
 
 # suzume
@@ -1858,7 +2472,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "watch suzume no tojimari": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/7"
-        }
+        },
+        category="movie",
+        display_name="Suzume no Tojimari",
+        sort_order=10
     )
 
 # weathering with you
@@ -1868,7 +2485,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️weathering with you⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/9"
-        }
+        },
+        category="movie",
+        display_name="Weathering With You",
+        sort_order=6
     )
 
     add_filter(
@@ -1887,7 +2507,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️spirited away⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/10"
-        }
+        },
+        category="movie",
+        display_name="Spirited Away",
+        sort_order=13
     )
 
 # bubble
@@ -1897,7 +2520,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️bubble⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/13"
-        }
+        },
+        category="movie",
+        display_name="Bubble",
+        sort_order=14
     )
 
 # my neighbor totoro
@@ -1907,7 +2533,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️my neighbor totoro⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/15"
-        }
+        },
+        category="movie",
+        display_name="My Neighbor Totoro",
+        sort_order=11
     )
 
     add_filter(
@@ -1926,7 +2555,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️over the sky⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/17"
-        }
+        },
+        category="movie",
+        display_name="Over the Sky",
+        sort_order=8
     )
 
 # a silent voice
@@ -1936,7 +2568,10 @@ def create_all_filters():
         use_buttons=True,
         button_links={
             "⚜️a silent voice⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/20"
-        }
+        },
+        category="movie",
+        display_name="A Silent Voice",
+        sort_order=7
     )
 
     add_filter(
@@ -1953,7 +2588,10 @@ def create_all_filters():
         "watch 5 cm per second",
         use_buttons=True,
         button_links={ "⚜️5 cm per second⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/24"
-        }
+        },
+        category="movie",
+        display_name="5 cm per Second",
+        sort_order=9
     )
 
     add_filter(
@@ -1969,7 +2607,10 @@ def create_all_filters():
         "watch hello world",
         use_buttons=True,
         button_links={ "⚜️hello world⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/25"
-        }
+        },
+        category="movie",
+        display_name="Hello World",
+        sort_order=15
     )
 
 #i want to eat your pancreas
@@ -1978,7 +2619,10 @@ def create_all_filters():
         "watch i want to eat your pancreas",
         use_buttons=True,
         button_links={ "⚜️i want to eat your pancreas⚜️": "https://t.me/ANIMEMOVIEHINDIDUBHINDISUB/27"
-        }
+        },
+        category="movie",
+        display_name="I Want to Eat Your Pancreas",
+        sort_order=3
     )
 
     add_filter(
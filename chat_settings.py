@@ -0,0 +1,90 @@
+"""Per-chat settings (ad deletion on/off, ...) that survive restarts.
+
+Reads come from memory. Writes update memory right away and are written
+behind: changes made within `flush_delay` seconds are appended to the
+store together, in a worker thread, so a handler never waits on the disk.
+The store is the same snapshot + append-only log format as the filters
+(see JsonLogStore), and is only read the first time a setting is needed.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds changes are collected before they are written
+FLUSH_DELAY = 1.0
+
+
+class ChatSettings:
+    """Settings per chat, {name: value}, backed by a JsonLogStore-like store"""
+
+    def __init__(self, store, flush_delay=FLUSH_DELAY):
+        self.store = store
+        self.flush_delay = flush_delay
+        # str(chat_id) -> {name: value}; loaded on first use
+        self._settings = None
+        self._dirty = set()
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+
+    def _all(self):
+        if self._settings is None:
+            try:
+                self._settings = self.store.load()
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading chat settings, starting with defaults: {e}")
+                self._settings = {}
+            logger.info(f"Loaded settings for {len(self._settings)} chats")
+        return self._settings
+
+    def get(self, chat_id, name, default=None):
+        settings = self._all().get(str(chat_id))
+        if settings is None:
+            return default
+        return settings.get(name, default)
+
+    def set(self, chat_id, name, value):
+        """Change a setting now; it is written to disk shortly after"""
+        key = str(chat_id)
+        # Replace rather than mutate, a flush may be writing the old dict right now
+        settings = dict(self._all().get(key) or {})
+        settings[name] = value
+        self._settings[key] = settings
+        self._dirty.add(key)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Also picks up changes made while a flush was writing, and retries failed writes
+        while True:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+            if not self._dirty:
+                return
+
+    async def flush(self):
+        """Write pending changes, compacting the store instead once its log is big enough"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            changes = {key: self._settings.get(key) for key in dirty}
+            try:
+                if self.store.needs_compaction():
+                    # Taken together with the changes, so the snapshot has all of them
+                    await asyncio.to_thread(self.store.compact, dict(self._settings))
+                else:
+                    await asyncio.to_thread(self.store.append, changes)
+            except OSError as e:
+                logger.error(f"Error saving chat settings, will retry: {e}")
+                self._dirty |= dirty
+
+    async def close(self):
+        """Write everything still pending (call on shutdown)"""
+        await self.flush()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
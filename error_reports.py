@@ -0,0 +1,118 @@
+"""Aggregated error reporting for the bot's error handler.
+
+A bug or an outage in a busy group raises the same exception for every
+message. Instead of an apology per failure, ErrorReporter:
+
+- tells a chat at most once per CHAT_NOTICE_INTERVAL that something went
+  wrong, and no more than GLOBAL_NOTICE_RATE chats per second overall
+- groups errors by signature (exception type and the bot's own line that
+  led to it), so only the first occurrence in a window gets its traceback
+  logged
+- counts every error, for a periodic summary to the bot admin
+"""
+
+import os
+import time
+import traceback
+
+from outbound import TokenBucket
+
+# Seconds between two "something went wrong" notices in the same chat
+CHAT_NOTICE_INTERVAL = 300.0
+# Notices per second across all chats, and how many can go out at once
+GLOBAL_NOTICE_RATE = 0.2
+GLOBAL_NOTICE_BURST = 5
+# Signatures listed in a summary, the rest are only counted
+SUMMARY_MAX_SIGNATURES = 10
+
+
+# Frames from files under this directory are the bot's own code
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _is_own_source(filename):
+    path = os.path.abspath(filename)
+    # A virtualenv inside the checkout is still third-party code
+    return path.startswith(SOURCE_DIR + os.sep) and 'site-packages' not in path
+
+
+def error_signature(error):
+    """Exception type plus the bot's own line that led to it, so repeats of one bug group together
+
+    The innermost frame is usually inside telegram or httpx and shared by
+    unrelated bugs, so the deepest frame in the bot's source is used instead.
+    """
+    frames = traceback.extract_tb(error.__traceback__) if error.__traceback__ else None
+    if frames:
+        own = [f for f in frames if _is_own_source(f.filename)]
+        frame = (own or frames)[-1]
+        return f"{type(error).__name__} at {os.path.basename(frame.filename)}:{frame.lineno}"
+    return type(error).__name__
+
+
+class _ErrorStats:
+    __slots__ = ('count', 'chats', 'example')
+
+    def __init__(self, example):
+        self.count = 0
+        self.chats = set()
+        self.example = example
+
+
+class ErrorReporter:
+    def __init__(self, chat_notice_interval=CHAT_NOTICE_INTERVAL,
+                 global_notice_rate=GLOBAL_NOTICE_RATE, global_notice_burst=GLOBAL_NOTICE_BURST):
+        self.chat_notice_interval = chat_notice_interval
+        self._notices = TokenBucket(global_notice_rate, global_notice_burst)
+        # chat_id -> time of the last notice sent to it
+        self._last_notice = {}
+        # signature -> _ErrorStats, since the last summary
+        self._stats = {}
+        self._window_started = time.monotonic()
+
+    def record(self, error, chat_id=None):
+        """Count error; returns True if its signature is new in the current window"""
+        signature = error_signature(error)
+        stats = self._stats.get(signature)
+        is_new = stats is None
+        if is_new:
+            stats = self._stats[signature] = _ErrorStats(str(error))
+        stats.count += 1
+        if chat_id is not None:
+            stats.chats.add(chat_id)
+        return is_new
+
+    def allow_chat_notice(self, chat_id):
+        """True if chat_id may be told about a failure now (and counts it as told)"""
+        now = time.monotonic()
+        last = self._last_notice.get(chat_id)
+        if last is not None and now - last < self.chat_notice_interval:
+            return False
+        if self._notices.delay(now):
+            return False
+        self._notices.take(now)
+        self._last_notice[chat_id] = now
+        return True
+
+    def summary(self):
+        """Text summarizing the errors since the last call, or None if there were none"""
+        now = time.monotonic()
+        # Forget notice times that no longer throttle anything
+        self._last_notice = {
+            chat_id: last for chat_id, last in self._last_notice.items()
+            if now - last < self.chat_notice_interval
+        }
+        stats, self._stats = self._stats, {}
+        minutes = max(1, round((now - self._window_started) / 60))
+        self._window_started = now
+        if not stats:
+            return None
+
+        total = sum(s.count for s in stats.values())
+        lines = [f"⚠️ {total} errors in the last {minutes} min:"]
+        ranked = sorted(stats.items(), key=lambda item: item[1].count, reverse=True)
+        for signature, s in ranked[:SUMMARY_MAX_SIGNATURES]:
+            lines.append(f"• {s.count}× {signature} ({len(s.chats)} chats): {s.example[:200]}")
+        if len(ranked) > SUMMARY_MAX_SIGNATURES:
+            lines.append(f"• …and {len(ranked) - SUMMARY_MAX_SIGNATURES} more kinds of error")
+        return '\n'.join(lines)
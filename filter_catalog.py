@@ -0,0 +1,212 @@
+"""In-memory filter catalog shared by the whole bot process.
+
+The filters file used to be opened and parsed for every message. The catalog
+loads it once, serves lookups from memory and only reloads it when the store
+changes on disk (mtime/size) or when a reload is explicitly requested.
+Persistence itself is left to a store object (see filter_store.py).
+"""
+
+import contextlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two checks of the store for outside changes
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Store entry (not a filter) holding the catalog's own data, like the next free short_id
+META_NAME = '__catalog__'
+
+
+class FilterCatalog:
+    """Process-wide cache of the filters kept in `store`.
+
+    The filters dict handed out by the catalog is never mutated in place:
+    every change builds a new dict and swaps it in, so a handler holding a
+    reference always sees a consistent snapshot. `version` is bumped on
+    every swap, and anything derived from the filters should be built with
+    `compiled()` so it is only rebuilt when the version changes.
+
+    Changes made inside `batch()` are collected in memory and handed to the
+    store as one set of changes when the outermost batch exits. Until then
+    `filters` and `get()` show them only to the thread running the batch, so
+    code in a batch reads its own writes and a `replace()` built from
+    `filters` keeps the earlier `set()` calls.
+
+    Every filter gets a small numeric `short_id` in its data, for places
+    like callback_data where the name may not fit. A filter keeps its id
+    when it is overwritten, and new filters get the next number from a
+    counter kept in the store (META_NAME), so an id is never reused, not
+    even after its filter was removed. Ids are written to the store as soon
+    as they are assigned, also for filters loaded without one.
+    """
+
+    def __init__(self, store, check_interval=RELOAD_CHECK_INTERVAL):
+        self.store = store
+        self.check_interval = check_interval
+        self.version = 0
+        self._filters = {}
+        self._stamp = None
+        self._next_check = 0.0
+        self._reload_requested = True
+        self._pending = None
+        self._batch_thread = None
+        self._compiled = {}
+        self._next_short_id = 1
+        self._lock = threading.RLock()
+
+    @property
+    def filters(self):
+        """Current filters dict (read-only, use the catalog methods to change it)"""
+        pending = self._pending
+        if pending is not None and self._batch_thread == threading.get_ident():
+            # Inside our own batch, which holds the lock
+            return pending
+        self._maybe_reload()
+        return self._filters
+
+    def get(self, name, default=None):
+        """Return the data of a single filter"""
+        return self.filters.get(name, default)
+
+    def compiled(self, key, build):
+        """Return build(filters), calling build again only after the catalog changed"""
+        filters = self.filters
+        if filters is self._pending:
+            # Not committed yet, and the version has not changed
+            return build(filters)
+        cached = self._compiled.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        value = build(filters)
+        self._compiled[key] = (self.version, value)
+        return value
+
+    def request_reload(self):
+        """Force a reload from disk on the next access (safe to call from a signal handler)"""
+        self._reload_requested = True
+
+    def compact(self):
+        """Fold the store's change log into a new snapshot if it has grown too big"""
+        with self._lock:
+            if not self.store.needs_compaction():
+                return False
+            self.store.compact({**self.filters, META_NAME: self._meta()})
+            self._stamp = self.store.stamp()
+            logger.info(f"Compacted {len(self._filters)} filters into a new snapshot")
+            return True
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Apply every change made inside the block with a single write to the store.
+
+        Nothing is written if the block raises, or if it leaves the filters
+        exactly as they were. Nested batches join the outermost one.
+        """
+        with self._lock:
+            if self._pending is not None:
+                yield
+                return
+            self._pending = dict(self.filters)
+            self._batch_thread = threading.get_ident()
+            try:
+                yield
+            except BaseException:
+                self._pending = self._batch_thread = None
+                raise
+            filters, self._pending, self._batch_thread = self._pending, None, None
+            next_short_id = self._next_short_id
+            self._assign_short_ids(filters)
+            changes = {name: data for name, data in filters.items() if self._filters.get(name) != data}
+            changes.update((name, None) for name in self._filters if name not in filters)
+            if self._next_short_id != next_short_id:
+                changes[META_NAME] = self._meta()
+            if not changes:
+                logger.info("Filters unchanged, skipping write")
+                return
+            self.store.append(changes)
+            # Remember our own write so it does not trigger a reload
+            self._stamp = self.store.stamp()
+            self._reload_requested = False
+            self._swap(filters)
+
+    def replace(self, filters):
+        """Replace the whole catalog"""
+        with self.batch():
+            self._pending = dict(filters)
+
+    def set(self, name, data):
+        """Add or overwrite a single filter"""
+        with self.batch():
+            self._pending[name] = data
+
+    def discard(self, name):
+        """Remove a single filter. Returns True if it existed."""
+        with self.batch():
+            return self._pending.pop(name, None) is not None
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self._reload_requested and now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.check_interval
+            stamp = self.store.stamp()
+            if not self._reload_requested and stamp == self._stamp:
+                return
+            self._reload_requested = False
+            self._load(stamp)
+
+    def _load(self, stamp):
+        try:
+            filters = self.store.load()
+        except (OSError, ValueError) as e:
+            # Keep serving what we have and try again on the next check
+            logger.error(f"Could not reload filters: {e}")
+            return
+        meta = filters.pop(META_NAME, None) or {}
+        self._next_short_id = max(self._next_short_id, meta.get('next_short_id', 1))
+        assigned = self._assign_short_ids(filters)
+        if assigned:
+            # Persist them right away, or they would change on the next load
+            changes = {name: filters[name] for name in assigned}
+            changes[META_NAME] = self._meta()
+            try:
+                self.store.append(changes)
+                stamp = self.store.stamp()
+                logger.info(f"Assigned short ids to {len(assigned)} filters")
+            except OSError as e:
+                logger.error(f"Could not save the short ids of {len(assigned)} filters: {e}")
+        self._stamp = stamp
+        self._swap(filters)
+        logger.info(f"Loaded {len(filters)} filters (version {self.version})")
+
+    def _assign_short_ids(self, filters):
+        """Give the filters without a short_id one, returns their names"""
+        # Ids written before the counter was, or by another process
+        for data in filters.values():
+            if 'short_id' in data:
+                self._next_short_id = max(self._next_short_id, data['short_id'] + 1)
+        assigned = []
+        for name, data in filters.items():
+            if 'short_id' in data:
+                continue
+            previous = self._filters.get(name)
+            if previous is not None and 'short_id' in previous:
+                # Overwritten without its id (e.g. by add_filter)
+                short_id = previous['short_id']
+            else:
+                short_id = self._next_short_id
+                self._next_short_id += 1
+            filters[name] = {**data, 'short_id': short_id}
+            assigned.append(name)
+        return assigned
+
+    def _meta(self):
+        return {'next_short_id': self._next_short_id}
+
+    def _swap(self, filters):
+        self._filters = filters
+        self.version += 1
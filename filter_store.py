@@ -0,0 +1,294 @@
+"""Crash-safe storage for the filter catalog.
+
+filters.json is kept as a snapshot that is only ever replaced atomically
+(write a temp file, then rename over it). Changes made after the snapshot
+are appended to filters.json.log, one JSON record per line, so a change
+costs one small append instead of rewriting the whole catalog. Loading
+replays the log on top of the snapshot; compact() folds the log back into
+a fresh snapshot.
+
+SqliteFilterStore is an optional drop-in replacement with the same
+interface, for bigger catalogs and several processes writing at once.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Compact once the log is bigger than this many bytes
+COMPACT_LOG_BYTES = 64 * 1024
+
+
+class JsonLogStore:
+    """Snapshot + append-only log store for filters"""
+
+    def __init__(self, path, compact_log_bytes=COMPACT_LOG_BYTES):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.compact_log_bytes = compact_log_bytes
+
+    def stamp(self):
+        """Changes whenever the snapshot or the log changes on disk"""
+        return (_file_stamp(self.path), _file_stamp(self.log_path))
+
+    def load(self):
+        """Read the snapshot and replay the log on top of it.
+
+        An unreadable snapshot is renamed aside and the log is replayed on
+        top of an empty catalog, so the changes since the last compaction
+        survive; a torn record at the end of the log (crash mid-append) is
+        skipped.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                filters = json.load(f)
+            if not isinstance(filters, dict):
+                raise ValueError(f"expected an object, got {type(filters).__name__}")
+        except FileNotFoundError:
+            filters = {}
+        except ValueError as e:
+            corrupt_path = f"{self.path}.corrupt-{int(time.time())}"
+            os.replace(self.path, corrupt_path)
+            logger.error(f"Unreadable snapshot {self.path} ({e}), moved it to {corrupt_path}; "
+                         f"loading only the changes in {self.log_path}")
+            filters = {}
+
+        try:
+            with open(self.log_path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        for line_number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable record {line_number} in {self.log_path}")
+                continue
+            if record.get('data') is None:
+                filters.pop(record['name'], None)
+            else:
+                filters[record['name']] = record['data']
+        return filters
+
+    def append(self, changes):
+        """Append changes ({name: data, or None to remove}) to the log"""
+        records = ''.join(
+            json.dumps({'name': name, 'data': data}) + '\n' for name, data in changes.items()
+        ).encode('utf-8')
+        with open(self.log_path, 'ab+') as f:
+            # Start on a fresh line if a crash left a torn record at the end
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    records = b'\n' + records
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def needs_compaction(self):
+        """True once the log has grown past compact_log_bytes, or if there is no snapshot"""
+        stamp = _file_stamp(self.log_path)
+        if stamp is None:
+            return False
+        return stamp[1] > self.compact_log_bytes or _file_stamp(self.path) is None
+
+    def compact(self, filters):
+        """Write filters as the new snapshot and empty the log"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(filters, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Replaying the old log over the new snapshot gives the same result,
+        # so a crash before this point loses nothing
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class SqliteFilterStore:
+    """SQLite store for filters, for larger catalogs and several writers.
+
+    Filters, their button links and their aliases live in separate tables
+    indexed by normalized name, and the database runs in WAL mode so the
+    bot keeps reading while an admin script writes. Each batch of changes
+    is one transaction that only touches the filters it changes, so two
+    writers never overwrite each other's unrelated filters.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        # The catalog serializes access, compaction runs in a worker thread
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def stamp(self):
+        """Changes whenever another connection commits to the database"""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self):
+        """Read every filter"""
+        with self._lock:
+            links = {}
+            for filter_id, title, url in self._conn.execute(
+                    "SELECT filter_id, title, url FROM button_links ORDER BY filter_id, position"):
+                links.setdefault(filter_id, {})[title] = url
+            aliases = {}
+            for filter_id, alias in self._conn.execute(
+                    "SELECT filter_id, alias FROM aliases ORDER BY filter_id, position"):
+                aliases.setdefault(filter_id, []).append(alias)
+
+            filters = {}
+            for filter_id, name, data in self._conn.execute("SELECT id, name, data FROM filters ORDER BY id"):
+                filters[name] = _decode_filter(json.loads(data), links.get(filter_id), aliases.get(filter_id))
+            return filters
+
+    def lookup(self, name):
+        """Indexed lookup of one filter by name or alias, returns (name, data) or None"""
+        normalized = normalize_name(name)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, data FROM filters WHERE normalized_name = ?", (normalized,)
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT filters.id, filters.name, filters.data FROM aliases "
+                    "JOIN filters ON filters.id = aliases.filter_id "
+                    "WHERE aliases.normalized_alias = ? ORDER BY filters.id LIMIT 1", (normalized,)
+                ).fetchone()
+            if row is None:
+                return None
+            filter_id, name, data = row
+            links = self._conn.execute(
+                "SELECT title, url FROM button_links WHERE filter_id = ? ORDER BY position", (filter_id,)
+            ).fetchall()
+            aliases = self._conn.execute(
+                "SELECT alias FROM aliases WHERE filter_id = ? ORDER BY position", (filter_id,)
+            ).fetchall()
+            return name, _decode_filter(json.loads(data), dict(links), [alias for (alias,) in aliases])
+
+    def append(self, changes):
+        """Apply changes ({name: data, or None to remove}) in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, data in changes.items():
+                    if data is None:
+                        self._conn.execute("DELETE FROM filters WHERE name = ?", (name,))
+                    else:
+                        self._write_filter(name, data)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _write_filter(self, name, data):
+        data = dict(data)
+        links = data.pop('button_links', None) if data.get('button_links') else None
+        aliases = data.pop('aliases', None) if data.get('aliases') else None
+        row = self._conn.execute("SELECT id FROM filters WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            filter_id = self._conn.execute(
+                "INSERT INTO filters (name, normalized_name, content, data) VALUES (?, ?, ?, ?)",
+                (name, normalize_name(name), data.get('content'), json.dumps(data))
+            ).lastrowid
+        else:
+            filter_id = row[0]
+            self._conn.execute(
+                "UPDATE filters SET content = ?, data = ? WHERE id = ?",
+                (data.get('content'), json.dumps(data), filter_id)
+            )
+            self._conn.execute("DELETE FROM button_links WHERE filter_id = ?", (filter_id,))
+            self._conn.execute("DELETE FROM aliases WHERE filter_id = ?", (filter_id,))
+        self._conn.executemany(
+            "INSERT INTO button_links (filter_id, position, title, url) VALUES (?, ?, ?, ?)",
+            [(filter_id, position, title, url) for position, (title, url) in enumerate((links or {}).items())]
+        )
+        self._conn.executemany(
+            "INSERT INTO aliases (filter_id, position, alias, normalized_alias) VALUES (?, ?, ?, ?)",
+            [(filter_id, position, alias, normalize_name(alias)) for position, alias in enumerate(aliases or ())]
+        )
+
+    def needs_compaction(self):
+        """The WAL file is always worth checkpointing"""
+        return True
+
+    def compact(self, filters):
+        """Checkpoint the WAL back into the database file"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM filters LIMIT 1").fetchone() is None
+
+    def migrate_from(self, store):
+        """One-shot import of every filter from another store (e.g. JsonLogStore).
+
+        Does nothing if this database already has filters, so it is safe to
+        call on every start.
+        """
+        if not self.is_empty():
+            return 0
+        filters = store.load()
+        if filters:
+            self.append(filters)
+            logger.info(f"Migrated {len(filters)} filters into {self.path}")
+        return len(filters)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS filters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    normalized_name TEXT NOT NULL,
+    content TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS filters_normalized_name ON filters (normalized_name);
+CREATE TABLE IF NOT EXISTS button_links (
+    filter_id INTEGER NOT NULL REFERENCES filters (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (filter_id, position)
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    filter_id INTEGER NOT NULL REFERENCES filters (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    normalized_alias TEXT NOT NULL,
+    PRIMARY KEY (filter_id, position)
+);
+CREATE INDEX IF NOT EXISTS aliases_normalized_alias ON aliases (normalized_alias);
+"""
+
+
+def normalize_name(name):
+    """Lowercase and collapse whitespace, the key used by the SQLite indexes"""
+    return ' '.join(name.lower().split())
+
+
+def _decode_filter(data, links, aliases):
+    if links:
+        data['button_links'] = links
+    if aliases:
+        data['aliases'] = aliases
+    return data
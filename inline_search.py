@@ -0,0 +1,48 @@
+"""Answers for inline queries (@bot <title>) from the filter catalog.
+
+An InlineSearch is built once per catalog version (see
+FilterCatalog.compiled): a PrefixIndex over the titles and aliases plus the
+ready-made results. Answered queries are kept in a small LRU keyed by the
+normalized query, so the same prefix typed by many users is looked up once.
+"""
+
+from collections import OrderedDict
+
+from matchers import PrefixIndex, normalize
+from metrics import registry
+
+# Telegram shows at most 50 results per answer
+MAX_RESULTS = 50
+# Distinct normalized queries kept
+CACHE_SIZE = 1024
+
+INLINE_QUERIES = registry.counter(
+    'bot_inline_queries_total', "Inline queries by result cache outcome", ['cache'])
+
+
+class InlineSearch:
+    def __init__(self, terms, results, limit=MAX_RESULTS, cache_size=CACHE_SIZE):
+        # terms: (title or alias, key) in rank order; results: key -> InlineQueryResult,
+        # in the order they are shown for an empty query
+        self.results = results
+        self.cache_size = cache_size
+        self._index = PrefixIndex(terms, limit)
+        self._default = list(results.values())[:limit]
+        self._cache = OrderedDict()
+
+    def search(self, query):
+        """Results for query, best first (all titles for an empty query)"""
+        query = normalize(query)
+        if not query:
+            return self._default
+        found = self._cache.get(query)
+        if found is not None:
+            self._cache.move_to_end(query)
+            INLINE_QUERIES.inc('hit')
+            return found
+        INLINE_QUERIES.inc('miss')
+        found = [self.results[key] for key in self._index.search(query)]
+        self._cache[query] = found
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return found
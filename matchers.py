@@ -0,0 +1,330 @@
+"""Precompiled text matchers used by handle_message.
+
+Matchers are built once per catalog version (see FilterCatalog.compiled)
+so that matching a message never depends on the number of filters.
+"""
+
+import re
+import time
+from collections import deque, namedtuple
+
+# Punctuation ignored at the end of a requested title
+_TRAILING_PUNCTUATION = '!?.,'
+
+# Everything that is not a letter or digit, ignored by fuzzy matching
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+# A match of `name` found at text[start:end]
+Match = namedtuple('Match', ['name', 'start', 'end'])
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher.
+
+    find_longest() returns the same pattern as checking every pattern with
+    `pattern in text`, longest first (ties broken by the order the patterns
+    were given in), but does it in a single pass over the text.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [p for p in dict.fromkeys(patterns) if p]
+        # Trie transitions, failure links and, for every state, the best
+        # pattern (longest, then earliest) ending at that state
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = next_state
+            if self._best[state] is None:
+                self._best[state] = index
+        self._build_links()
+
+    def _rank(self, index):
+        if index is None:
+            return None
+        return (-len(self.patterns[index]), index)
+
+    def _better(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if self._rank(a) < self._rank(b) else b
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                # States are visited breadth first, so the failure state's
+                # best pattern is already final here
+                self._best[next_state] = self._better(self._best[next_state], self._best[fail])
+
+    def find_longest(self, text):
+        """Return the Match of the longest pattern found in text, or None"""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best = None
+        best_end = 0
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            candidate = best_at[state]
+            if candidate is not None and candidate != best and self._better(best, candidate) == candidate:
+                best = candidate
+                best_end = position + 1
+        if best is None:
+            return None
+        name = self.patterns[best]
+        return Match(name, best_end - len(name), best_end)
+
+
+# The title asked for in a request like "give me <title> link", found at text[start:end]
+RequestMatch = namedtuple('RequestMatch', ['title', 'start', 'end'])
+
+
+class RequestPatternMatcher:
+    """Extracts the requested title from messages like "i want <title>" or "<title> channel".
+
+    All prefixes and suffixes are compiled into one regex each, so a
+    message is scanned once no matter how many patterns are configured.
+    """
+
+    def __init__(self, prefixes, suffixes):
+        prefix_alternatives = '|'.join(re.escape(p) for p in sorted(prefixes, key=len, reverse=True))
+        suffix_alternatives = '|'.join(re.escape(s) for s in sorted(suffixes, key=len, reverse=True))
+        self._prefix_re = re.compile(rf"\b(?:{prefix_alternatives})\s+(?P<title>\S.*)")
+        self._suffix_re = re.compile(rf"(?:\s+(?:{suffix_alternatives})\b)+[\s{_TRAILING_PUNCTUATION}]*$")
+
+    def match(self, text):
+        """Return the RequestMatch found in text, or None if it is not a request"""
+        prefix_match = self._prefix_re.search(text)
+        if prefix_match:
+            start, end = prefix_match.span('title')
+        else:
+            start, end = 0, len(text)
+        suffix_match = self._suffix_re.search(text, start, end)
+        if suffix_match:
+            end = suffix_match.start()
+        elif not prefix_match:
+            return None
+        title = text[start:end].rstrip(_TRAILING_PUNCTUATION + ' ')
+        if not title:
+            return None
+        return RequestMatch(title, start, start + len(title))
+
+
+class KeywordIndex:
+    """Maps the words of a message to filters through their keyword aliases.
+
+    Words are checked left to right and the first word that hits wins:
+    - a multi-word keyword starting at that word ("tokyo 24th ward"),
+      longest first
+    - the word itself being a keyword (hash lookup)
+    - the longest keyword contained in the word, so "narutooo" still
+      finds "naruto" (one Aho-Corasick pass over the word)
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, filter_name); the first filter to
+        # claim a keyword keeps it
+        self._words = {}
+        self._phrases = {}
+        self._max_phrase_length = 0
+        for keyword, filter_name in keywords:
+            tokens = tuple(keyword.lower().split())
+            if len(tokens) == 1:
+                self._words.setdefault(tokens[0], filter_name)
+            elif tokens:
+                self._phrases.setdefault(tokens, filter_name)
+                self._max_phrase_length = max(self._max_phrase_length, len(tokens))
+        self._substrings = AhoCorasick(self._words)
+
+    def find(self, text):
+        """Return (keyword, filter_name) for the first keyword in text, or None"""
+        words = text.split()
+        for position, word in enumerate(words):
+            longest = min(self._max_phrase_length, len(words) - position)
+            for length in range(longest, 1, -1):
+                phrase = tuple(words[position:position + length])
+                if phrase in self._phrases:
+                    return ' '.join(phrase), self._phrases[phrase]
+            if word in self._words:
+                return word, self._words[word]
+            match = self._substrings.find_longest(word)
+            if match:
+                return match.name, self._words[match.name]
+        return None
+
+
+# A fuzzy hit: `term` (a filter name or alias) of filter `name`, `distance` edits away
+FuzzyMatch = namedtuple('FuzzyMatch', ['term', 'name', 'distance'])
+
+
+def normalize(text):
+    """Lowercase text with punctuation turned into single spaces, as the indexes compare titles"""
+    return ' '.join(_NON_ALNUM.sub(' ', text.lower()).split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """Levenshtein distance between a and b, or None if it is above max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class TrigramIndex:
+    """Fuzzy title lookup for misspellings like "attak on titen" or "haikyu".
+
+    Candidates are the terms sharing the most character trigrams with the
+    query; only the best `max_candidates` of them get the (comparatively
+    expensive) edit distance check, and the search stops once
+    `time_budget` seconds have been spent.
+    """
+
+    def __init__(self, terms, max_edit_ratio=0.25, min_similarity=0.4):
+        # terms: iterable of (term, filter_name); the first filter to claim
+        # a term keeps it
+        self.max_edit_ratio = max_edit_ratio
+        self.min_similarity = min_similarity
+        self._terms = []
+        self._names = []
+        self._grams = []
+        self._postings = {}
+        seen = set()
+        for term, filter_name in terms:
+            term = normalize(term)
+            if not term or term in seen:
+                continue
+            seen.add(term)
+            grams = _trigrams(term)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(len(self._terms))
+            self._terms.append(term)
+            self._names.append(filter_name)
+            self._grams.append(len(grams))
+        self._max_length = max((len(term) for term in self._terms), default=0)
+
+    def _max_distance(self, term):
+        # Short terms ("aot", "solo") are too easy to hit by accident
+        if len(term) < 5:
+            return 0
+        return max(1, int(len(term) * self.max_edit_ratio))
+
+    def search(self, query, max_candidates=20, time_budget=0.001):
+        """Return the closest FuzzyMatch for query, or None"""
+        deadline = time.perf_counter() + time_budget
+        query = normalize(query)
+        if not query or len(query) > self._max_length + self._max_distance(query):
+            return None
+        query_grams = _trigrams(query)
+        shared = {}
+        for gram in query_grams:
+            for term_id in self._postings.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        # Dice coefficient over trigram sets, best candidates first
+        candidates = []
+        for term_id, count in shared.items():
+            similarity = 2 * count / (len(query_grams) + self._grams[term_id])
+            if similarity >= self.min_similarity:
+                candidates.append((similarity, term_id))
+        candidates.sort(reverse=True)
+
+        best = None
+        for similarity, term_id in candidates[:max_candidates]:
+            if time.perf_counter() > deadline:
+                break
+            term = self._terms[term_id]
+            limit = self._max_distance(term)
+            if best is not None:
+                if best.distance == 0:
+                    break
+                limit = min(limit, best.distance - 1)
+            distance = bounded_edit_distance(query, term, limit)
+            if distance is not None:
+                best = FuzzyMatch(term, self._names[term_id], distance)
+        return best
+
+
+class PrefixIndex:
+    """Search-as-you-type lookup of titles and aliases by prefix.
+
+    Every trie node keeps the keys of its first `limit` terms, so a search
+    walks len(query) nodes and returns a ready list. A query matches a term
+    from its start ("sol" -> "solo leveling") and, ranked after those, from
+    the start of any later word ("lev" -> "solo leveling").
+    """
+
+    def __init__(self, terms, limit=50):
+        # terms: iterable of (term, key) in rank order; a key is listed once
+        # per node, at its best rank
+        self.limit = limit
+        self._children = [{}]
+        self._keys = [[]]
+        terms = [(normalize(term), key) for term, key in terms]
+        # Whole terms first, then the same terms from their second word on
+        for term, key in terms:
+            self._insert(term, key)
+        for term, key in terms:
+            words = term.split(' ')
+            for position in range(1, len(words)):
+                self._insert(' '.join(words[position:]), key)
+
+    def _insert(self, term, key):
+        state = 0
+        for char in term:
+            next_state = self._children[state].get(char)
+            if next_state is None:
+                next_state = self._children[state][char] = len(self._children)
+                self._children.append({})
+                self._keys.append([])
+            state = next_state
+            keys = self._keys[state]
+            if len(keys) < self.limit and key not in keys:
+                keys.append(key)
+
+    def search(self, query):
+        """Keys of the terms starting with query (any word of them), best first"""
+        query = normalize(query)
+        if not query:
+            return []
+        state = 0
+        for char in query:
+            state = self._children[state].get(char)
+            if state is None:
+                return []
+        return self._keys[state]
@@ -0,0 +1,197 @@
+"""Low-overhead counters and latency histograms for the bot.
+
+Metrics are plain in-memory numbers updated from the event loop. They can
+be served in Prometheus text format on a local HTTP endpoint (serve) and
+dumped to a file (dump), both optional.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from a fast dict lookup to a slow Telegram call
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    """Counter with one value per combination of label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._children = {}
+
+    def labels(self, *label_values):
+        """Child counter for these label values; keep it around on hot paths"""
+        child = self._children.get(label_values)
+        if child is None:
+            child = self._children[label_values] = _CounterChild()
+        return child
+
+    def inc(self, *label_values, amount=1):
+        self.labels(*label_values).value += amount
+
+    def samples(self):
+        for label_values, child in sorted(self._children.items()):
+            yield self.name, self._label_pairs(label_values), child.value
+
+    def _label_pairs(self, label_values):
+        return list(zip(self.label_names, label_values))
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram(Counter):
+    """Histogram with fixed buckets, one per combination of label values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def labels(self, *label_values):
+        child = self._children.get(label_values)
+        if child is None:
+            child = self._children[label_values] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value, *label_values):
+        self.labels(*label_values).observe(value)
+
+    def samples(self):
+        for label_values, child in sorted(self._children.items()):
+            pairs = self._label_pairs(label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket", pairs + [('le', repr(bound))], cumulative
+            yield f"{self.name}_bucket", pairs + [('le', '+Inf')], child.count
+            yield f"{self.name}_sum", pairs, child.total
+            yield f"{self.name}_count", pairs, child.count
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'count', 'total')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus one for values above the last bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def time_since(self, started):
+        """Observe the time elapsed since a time.perf_counter() reading"""
+        self.observe(time.perf_counter() - started)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, pairs, value in metric.samples():
+                if pairs:
+                    labels = ','.join(f'{key}="{_escape(str(val))}"' for key, val in pairs)
+                    lines.append(f"{name}{{{labels}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write render() to path, replacing the previous dump atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    async def serve(self, host='127.0.0.1', port=9464):
+        """Serve GET /metrics on a local HTTP endpoint; returns the asyncio server"""
+        async def handle(reader, writer):
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+                # Skip the headers, nothing in them matters here
+                while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                    pass
+                parts = request_line.decode('latin-1').split()
+                if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                    status, body = '200 OK', self.render().encode('utf-8')
+                else:
+                    status, body = '404 Not Found', b'Not found\n'
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: close\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                logger.debug(f"Metrics request failed: {e}")
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+
+def timed(histogram_child):
+    """Decorator observing how long an async function takes"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram_child.time_since(started)
+        return wrapper
+    return decorator
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# Registry shared by the whole bot process
+registry = MetricsRegistry()
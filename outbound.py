@@ -0,0 +1,432 @@
+"""Outbound message scheduler that keeps the bot inside Telegram's rate limits.
+
+Every message the bot sends is queued here instead of being sent straight
+away. The scheduler sends them as fast as the limits allow:
+
+- a global token bucket (Telegram allows about 30 messages per second)
+- a token bucket per chat (20 messages per minute in a group, about one
+  per second in a private chat)
+- priority lanes, so command replies go out before welcome messages
+- RetryAfter answers pause the chat for as long as Telegram asks and the
+  message is sent again afterwards, instead of being retried blindly
+- an identical message already waiting for the same chat is not queued
+  twice (e.g. several people asking for the same anime at once)
+- a message still queued DELIVERY_DEADLINE seconds after it was submitted
+  is dropped instead of answering a question minutes late, and a chat holds
+  at most MAX_CHAT_QUEUE messages, the oldest least urgent one making room
+
+Failed sends are sorted into retryable errors (network trouble, requests
+that timed out before reaching Telegram), which are retried with jittered
+exponential backoff until the message's deadline, and the rest, which are
+not retried at all: permanent ones (bad request, bot kicked or blocked) and
+timeouts after the request was sent, since Telegram may have delivered the
+message already. A chat whose messages keep being refused gets its circuit
+opened: nothing is sent to it for a while, so a group that removed the bot
+does not cost an API call per message.
+
+Messages for one chat are sent one at a time, in order within a lane.
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from datetime import timedelta
+
+import httpx
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError, TimedOut
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, most urgent first
+PRIORITY_COMMAND = 0
+PRIORITY_REPLY = 1
+PRIORITY_WELCOME = 2
+LANE_NAMES = ('command', 'reply', 'welcome')
+
+# Telegram's limits for bots, in messages per second
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+GROUP_RATE = 20 / 60
+GROUP_BURST = 3
+PRIVATE_RATE = 1.0
+PRIVATE_BURST = 3
+# A message is sent or retried until this many seconds after it was queued, then dropped
+DELIVERY_DEADLINE = 30.0
+# Messages queued for one chat, across its lanes
+MAX_CHAT_QUEUE = 20
+# Backoff before retry n is random between 0 and min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**n)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+# After this many messages in a row failed for a chat (or at once if the bot
+# was kicked or blocked), nothing is sent to it for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60.0
+
+OUTBOUND_MESSAGES = registry.counter(
+    'bot_outbound_messages_total', "Outbound messages by lane and outcome", ['lane', 'result'])
+OUTBOUND_QUEUE_TIME = registry.histogram(
+    'bot_outbound_queue_seconds', "Time outbound messages waited in the scheduler", ['lane'])
+OUTBOUND_RETRIES = registry.counter(
+    'bot_outbound_retries_total', "Outbound sends retried, by reason", ['reason'])
+OUTBOUND_CIRCUITS_OPENED = registry.counter(
+    'bot_outbound_circuits_opened_total', "Times a chat's circuit breaker opened")
+
+
+class ChatUnavailable(Exception):
+    """The chat's circuit breaker is open, the message was not sent"""
+
+
+class MessageDropped(Exception):
+    """The message expired in the queue, or was pushed out of a full one, and was not sent"""
+
+
+def is_retryable(error):
+    """Network trouble is worth retrying; Telegram refusing the message is not"""
+    # BadRequest is a NetworkError subclass, but resending the same request never helps
+    if not isinstance(error, NetworkError) or isinstance(error, BadRequest):
+        return False
+    if isinstance(error, TimedOut):
+        # Messages are not idempotent: only resend if the request never left (no
+        # connection, or no free one in the pool), else the user may get it twice
+        return isinstance(error.__cause__, (httpx.ConnectTimeout, httpx.PoolTimeout))
+    return True
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Allows `rate` events per second on average, up to `capacity` at once (rate None: unlimited)"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Seconds until the next event is allowed"""
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        if self.rate is not None:
+            self._refill(now)
+            self.tokens -= 1
+
+    def is_full(self, now):
+        if self.rate is None:
+            return True
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'call', 'future', 'coalesce_key', 'queued_at', 'deadline', 'attempts')
+
+    def __init__(self, priority, seq, call, future, coalesce_key, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.call = call
+        self.future = future
+        self.coalesce_key = coalesce_key
+        self.queued_at = time.monotonic()
+        self.deadline = self.queued_at + deadline
+        self.attempts = 0
+
+
+class _ChatQueue:
+    __slots__ = ('chat_id', 'lanes', 'bucket', 'paused_until', 'busy', 'pending')
+
+    def __init__(self, chat_id, bucket):
+        self.chat_id = chat_id
+        self.lanes = [deque() for _ in LANE_NAMES]
+        self.bucket = bucket
+        self.paused_until = 0.0
+        self.busy = False
+        # coalesce_key -> queued job
+        self.pending = {}
+
+    def head(self):
+        for lane in self.lanes:
+            if lane:
+                return lane[0]
+        return None
+
+
+class _CircuitBreaker:
+    __slots__ = ('failures', 'open_until')
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+
+class OutboundScheduler:
+    """Queues outbound messages and sends them within the rate limits.
+
+    The dispatcher task starts on the first submit(); close() stops it.
+    Pass None as a rate to disable that limit.
+    """
+
+    def __init__(self, global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST,
+                 group_rate=GROUP_RATE, group_burst=GROUP_BURST,
+                 private_rate=PRIVATE_RATE, private_burst=PRIVATE_BURST,
+                 deadline=DELIVERY_DEADLINE, max_chat_queue=MAX_CHAT_QUEUE,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.deadline = deadline
+        self.max_chat_queue = max_chat_queue
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats = {}
+        # chat_id -> _CircuitBreaker, only for chats whose last message failed
+        self._breakers = {}
+        self._seq = itertools.count()
+        self._queued = 0
+        self._loop = None
+        self._task = None
+        self._sending = set()
+
+    def submit(self, chat_id, call, priority=PRIORITY_REPLY, coalesce_key=None):
+        """Queue call(), a coroutine function sending one message to chat_id.
+
+        Returns a future with call()'s result. If a message with the same
+        coalesce_key is still waiting for this chat, its future is returned
+        and nothing new is queued. If the chat's queue is full, the oldest
+        message of its least urgent lane is dropped to make room, or this
+        one if everything queued is more urgent. Failures are logged here,
+        so callers do not have to await the future.
+        """
+        self._ensure_running()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _ChatQueue(chat_id, self._chat_bucket(chat_id))
+        if coalesce_key is not None:
+            job = chat.pending.get(coalesce_key)
+            if job is not None:
+                OUTBOUND_MESSAGES.inc(LANE_NAMES[priority], 'coalesced')
+                return job.future
+
+        if sum(map(len, chat.lanes)) >= self.max_chat_queue:
+            lowest = max(p for p, lane in enumerate(chat.lanes) if lane)
+            if lowest < priority:
+                OUTBOUND_MESSAGES.inc(LANE_NAMES[priority], 'dropped')
+                logger.warning(f"Queue of chat {chat_id} is full, dropping a new {LANE_NAMES[priority]} message")
+                future = self._loop.create_future()
+                future.set_exception(MessageDropped(f"queue full for chat {chat_id}"))
+                future.exception()
+                return future
+            OUTBOUND_MESSAGES.inc(LANE_NAMES[lowest], 'dropped')
+            logger.warning(f"Queue of chat {chat_id} is full, dropping its oldest {LANE_NAMES[lowest]} message")
+            self._finish(chat, chat.lanes[lowest].popleft(), error=MessageDropped(f"queue full for chat {chat_id}"))
+
+        job = _Job(priority, next(self._seq), call, self._loop.create_future(), coalesce_key, self.deadline)
+        chat.lanes[priority].append(job)
+        if coalesce_key is not None:
+            chat.pending[coalesce_key] = job
+        self._queued += 1
+        self._wakeup.set()
+        return job.future
+
+    async def flush(self):
+        """Wait until every queued message has been sent (or has failed)"""
+        if self._loop is not None and self._queued:
+            await self._drained.wait()
+
+    async def close(self, timeout=10):
+        """Send what is still queued (for up to timeout seconds), then stop"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queued} queued outbound messages on shutdown")
+        self._task.cancel()
+        self._task = None
+
+    def _chat_bucket(self, chat_id):
+        if chat_id < 0:
+            return TokenBucket(self.group_rate, self.group_burst)
+        return TokenBucket(self.private_rate, self.private_burst)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the previous event loop is gone together with its queue
+            self._loop = loop
+            self._chats = {}
+            self._queued = 0
+            self._wakeup = asyncio.Event()
+            self._drained = asyncio.Event()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._dispatch())
+
+    def _next_ready(self, now):
+        """The chat whose head message should go out next, and else how long to wait"""
+        best = None
+        best_chat = None
+        wait = None
+        idle = []
+        for chat_id, chat in self._chats.items():
+            if chat.busy:
+                continue
+            job = chat.head()
+            if job is None:
+                if chat.paused_until <= now and chat.bucket.is_full(now):
+                    idle.append(chat_id)
+                continue
+            ready_in = max(chat.paused_until - now, chat.bucket.delay(now))
+            if ready_in > 0:
+                wait = ready_in if wait is None else min(wait, ready_in)
+            elif best is None or (job.priority, job.seq) < (best.priority, best.seq):
+                best = job
+                best_chat = chat
+        # Forget chats with nothing queued once they have no rate limit state left
+        for chat_id in idle:
+            del self._chats[chat_id]
+        return best_chat, wait
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            chat, wait = self._next_ready(now)
+            if chat is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            global_delay = self._global.delay(now)
+            if global_delay:
+                # Pick again afterwards, something more urgent may have arrived
+                await asyncio.sleep(global_delay)
+                continue
+
+            job = chat.lanes[chat.head().priority].popleft()
+            if now > job.deadline:
+                # Too late to be useful, e.g. a reply in a group at its rate limit
+                OUTBOUND_MESSAGES.inc(LANE_NAMES[job.priority], 'expired')
+                logger.warning(f"Dropping message to chat {chat.chat_id} after {now - job.queued_at:.0f}s in the queue")
+                self._finish(chat, job, error=MessageDropped(f"expired in the queue for chat {chat.chat_id}"))
+                continue
+            breaker = self._breakers.get(chat.chat_id)
+            if breaker is not None and breaker.open_until > now:
+                # Fail fast without spending any rate limit on it
+                OUTBOUND_MESSAGES.inc(LANE_NAMES[job.priority], 'chat_unavailable')
+                self._finish(chat, job, error=ChatUnavailable(f"circuit open for chat {chat.chat_id}"))
+                continue
+            self._global.take(now)
+            chat.bucket.take(now)
+            chat.busy = True
+            task = asyncio.create_task(self._send(chat, job))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, chat, job):
+        lane = LANE_NAMES[job.priority]
+        try:
+            if job.future.done():
+                # Cancelled by the caller while it was queued
+                self._finish(chat, job)
+                return
+            job.attempts += 1
+            try:
+                result = await job.call()
+            except RetryAfter as e:
+                if self._retry(chat, job, _seconds(e.retry_after), 'retry_after'):
+                    logger.warning(f"Flood limit hit, pausing chat {chat.chat_id} for {e.retry_after}s before resending")
+                    return
+                error = e
+            except Exception as e:
+                if is_retryable(e) and self._retry(chat, job, backoff_delay(job.attempts), 'network'):
+                    logger.warning(f"Retrying message to chat {chat.chat_id} after error: {e}")
+                    return
+                error = e
+            else:
+                OUTBOUND_MESSAGES.inc(lane, 'sent')
+                OUTBOUND_QUEUE_TIME.observe(time.monotonic() - job.queued_at, lane)
+                self._breakers.pop(chat.chat_id, None)
+                self._finish(chat, job, result=result)
+                return
+
+            OUTBOUND_MESSAGES.inc(lane, 'failed')
+            if not isinstance(error, TelegramError):
+                # Our own bug (e.g. bad arguments), not the chat's fault: keep the circuit closed
+                logger.error(f"Bug sending message to chat {chat.chat_id}: {error!r}", exc_info=error)
+            elif isinstance(error, TimedOut) and not is_retryable(error):
+                logger.error(f"Message to chat {chat.chat_id} timed out and may or may not have been delivered, not resending it")
+            else:
+                logger.error(f"Giving up on message to chat {chat.chat_id} after {job.attempts} attempts: {error}")
+                self._record_failure(chat.chat_id, error)
+            self._finish(chat, job, error=error)
+        finally:
+            chat.busy = False
+            self._wakeup.set()
+
+    def _retry(self, chat, job, delay, reason):
+        """Requeue job at the head of its lane in delay seconds, unless that is past its deadline"""
+        now = time.monotonic()
+        if now + delay > job.deadline:
+            return False
+        OUTBOUND_RETRIES.inc(reason)
+        # Pausing the whole chat keeps its messages in order
+        chat.paused_until = max(chat.paused_until, now + delay)
+        chat.lanes[job.priority].appendleft(job)
+        return True
+
+    def _record_failure(self, chat_id, error):
+        breaker = self._breakers.get(chat_id)
+        if breaker is None:
+            breaker = self._breakers[chat_id] = _CircuitBreaker()
+        breaker.failures += 1
+        # Forbidden: the bot was kicked from the group or blocked by the user
+        if breaker.failures >= self.breaker_threshold or isinstance(error, Forbidden):
+            # After the cooldown the next message is tried again; if it fails
+            # too the circuit opens again straight away
+            breaker.open_until = time.monotonic() + self.breaker_cooldown
+            OUTBOUND_CIRCUITS_OPENED.inc()
+            logger.warning(f"Not sending to chat {chat_id} for {self.breaker_cooldown}s after {breaker.failures} failed messages")
+
+    def _finish(self, chat, job, result=None, error=None):
+        if job.coalesce_key is not None and chat.pending.get(job.coalesce_key) is job:
+            del chat.pending[job.coalesce_key]
+        if not job.future.done():
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+                # Already logged; don't warn about callers that never await it
+                job.future.exception()
+        self._queued -= 1
+        if not self._queued:
+            self._drained.set()
+            self._drained = asyncio.Event()
+
+
+def _seconds(retry_after):
+    """RetryAfter.retry_after is an int in older python-telegram-bot versions, a timedelta in newer ones"""
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
@@ -0,0 +1,73 @@
+"""Concurrent update processing that keeps every chat's updates in order.
+
+With the default sequential processing one slow Bot API call in one group
+holds up every other group. ChatOrderedUpdateProcessor runs updates from
+different chats concurrently, while updates from the same chat still run
+one at a time in the order they arrived, so replies are never reordered.
+"""
+
+import asyncio
+
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Runs up to max_concurrent_updates handlers at once, one per chat at a time.
+
+    Updates waiting for an earlier update of their chat do not take one of
+    the max_concurrent_updates slots, so a burst in one busy group cannot
+    starve the others. max_pending_updates bounds how many updates can be
+    in flight in total (running plus waiting for their chat).
+    """
+
+    def __init__(self, max_concurrent_updates, max_pending_updates=1000):
+        # The base class semaphore bounds everything that is in flight;
+        # self._running bounds the handlers actually running
+        super().__init__(max(max_concurrent_updates, max_pending_updates))
+        self.max_running_updates = max_concurrent_updates
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        # Ordering key -> [lock, number of updates holding or waiting for it]
+        self._chat_locks = {}
+        self.pending = 0
+
+    async def do_process_update(self, update, coroutine):
+        key = _ordering_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        # Nothing is awaited before the lock is requested, and asyncio.Lock
+        # wakes waiters first come first served, so a chat's updates run in
+        # the order the application started them
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self.pending += 1
+        try:
+            async with entry[0]:
+                async with self._running:
+                    await coroutine
+        finally:
+            self.pending -= 1
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chat_locks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+def _ordering_key(update):
+    """Updates with the same key run in order: per chat, else per user (inline queries)"""
+    chat = getattr(update, 'effective_chat', None)
+    if chat is not None:
+        return ('chat', chat.id)
+    user = getattr(update, 'effective_user', None)
+    if user is not None:
+        return ('user', user.id)
+    return None
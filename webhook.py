@@ -0,0 +1,180 @@
+"""Embedded HTTP receiver for Telegram webhook updates.
+
+An alternative to long polling: Telegram POSTs every update to
+http://<listen>:<port><path>, the receiver checks the secret token header,
+decodes the update and puts it on the application's update queue. The
+queue (and, with ChatOrderedUpdateProcessor, the number of updates in
+flight) is bounded, so when the bot falls behind new updates are answered
+with 503 and Telegram delivers them again later instead of piling up in
+memory.
+
+Recorded updates can be replayed locally with curl, see README.md.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+
+from telegram import Update
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Telegram never sends anything close to this, anything bigger is not an update
+MAX_BODY_BYTES = 1024 * 1024
+# Seconds an idle keep-alive connection stays open
+IDLE_TIMEOUT = 60
+
+WEBHOOK_UPDATES = registry.counter(
+    'bot_webhook_updates_total', "Webhook requests by outcome", ['result'])
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 503: 'Service Unavailable',
+}
+
+
+class WebhookReceiver:
+    """Receives updates for `application` on `path`; start() and stop() it around the bot"""
+
+    def __init__(self, application, path='/telegram', secret_token=None, listen='127.0.0.1', port=8443,
+                 max_backlog=None):
+        self.application = application
+        # Updates queued or being handled before deliveries are deferred
+        self.max_backlog = max_backlog
+        self.path = '/' + path.strip('/')
+        self.secret_token = secret_token
+        self.listen = listen
+        self.port = port
+        self._server = None
+        self._writers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.listen, self.port)
+        logger.info(f"Receiving webhook updates on http://{self.listen}:{self.port}{self.path}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            # Idle keep-alive connections would otherwise keep their handlers waiting
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        # Telegram reuses connections, so serve requests until the client closes
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await asyncio.wait_for(_read_request(reader), timeout=IDLE_TIMEOUT)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status = self._handle_request(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                _write_response(writer, status, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Malformed webhook request: {e}")
+            _write_response(writer, 400, False)
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def backlog(self):
+        """Updates received but not handled yet"""
+        # Concurrent processing takes updates off the queue right away, so
+        # count the ones the update processor is still working on too
+        processor = getattr(self.application, 'update_processor', None)
+        return self.application.update_queue.qsize() + getattr(processor, 'pending', 0)
+
+    def _handle_request(self, method, target, headers, body):
+        """Queue the update in body, returns the HTTP status to answer with"""
+        if target.split('?')[0] != self.path:
+            return 404
+        if method != 'POST':
+            return 405
+        if self.secret_token is not None:
+            sent_token = headers.get('x-telegram-bot-api-secret-token', '')
+            if not hmac.compare_digest(sent_token.encode(), self.secret_token.encode()):
+                WEBHOOK_UPDATES.inc('forbidden')
+                logger.warning("Rejected webhook request with a wrong secret token")
+                return 403
+        if body is None:
+            WEBHOOK_UPDATES.inc('too_large')
+            return 413
+
+        try:
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+            update = Update.de_json(data, self.application.bot)
+            if update is None:
+                raise ValueError("empty update")
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            # Never queue something that is not an Update, the handlers and processor expect one
+            WEBHOOK_UPDATES.inc('bad_request')
+            logger.warning(f"Could not decode webhook update: {e!r}")
+            return 400
+
+        try:
+            if self.max_backlog is not None and self.backlog() >= self.max_backlog:
+                raise asyncio.QueueFull
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Telegram retries the delivery later
+            WEBHOOK_UPDATES.inc('queue_full')
+            logger.warning(f"Update queue full, deferring update {update.update_id}")
+            return 503
+        WEBHOOK_UPDATES.inc('accepted')
+        return 200
+
+
+async def _read_request(reader):
+    """Read one HTTP request, returns (method, target, headers, body) or None at EOF.
+
+    body is None when it is bigger than MAX_BODY_BYTES (it is still read, so
+    the connection stays usable).
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError(f"bad request line {request_line[:100]!r}")
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length') or 0)
+    if length < 0:
+        raise ValueError(f"bad content length {length}")
+    if length > MAX_BODY_BYTES:
+        while length:
+            length -= len(await reader.readexactly(min(length, 64 * 1024)))
+        return method, target, headers, None
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def _write_response(writer, status, keep_alive):
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Length: 0\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+    )
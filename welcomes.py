@@ -0,0 +1,100 @@
+"""Coalesced welcome messages for groups.
+
+During a raid or a bulk invite, welcoming every member separately costs
+one message each and eats the group's rate limit. WelcomeBatcher gathers
+the joins of a chat for `window` seconds and welcomes them with a single
+message. If the chat got a welcome less than `cooldown` seconds before,
+that welcome is replaced by the new one (which names everyone from both)
+instead of another one being stacked under it. Only the newest `max_names`
+names are kept, the others are counted, so a long raid costs no more
+memory and its welcome names the members who just joined.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+# Seconds joins are gathered before the welcome goes out
+WELCOME_WINDOW = 5.0
+# A welcome sent within this many seconds of the previous one replaces it
+WELCOME_COOLDOWN = 60.0
+# Names listed in one welcome, older ones are only counted
+WELCOME_MAX_NAMES = 20
+
+
+class _Names:
+    """The newest names of a burst of joins, and how many older ones were left out"""
+
+    __slots__ = ('recent', 'others')
+
+    def __init__(self, max_names, names=(), others=0):
+        self.recent = deque(maxlen=max_names)
+        self.others = others
+        self.extend(names)
+
+    def extend(self, names):
+        for name in names:
+            if len(self.recent) == self.recent.maxlen:
+                self.others += 1
+            self.recent.append(name)
+
+
+class _LastWelcome:
+    __slots__ = ('sent_at', 'message', 'names')
+
+    def __init__(self, sent_at, message, names):
+        self.sent_at = sent_at
+        self.message = message
+        self.names = names
+
+
+class WelcomeBatcher:
+    """Calls send_welcome(bot, chat_id, names, others, replaces) once per burst of joins.
+
+    send_welcome is a coroutine function that sends the welcome for `names`
+    (the newest joins, oldest first) and `others` more members, deleting
+    `replaces`, the previous welcome message, if it is not None. It returns
+    the sent message, or None if it could not be sent.
+    """
+
+    def __init__(self, send_welcome, window=WELCOME_WINDOW, cooldown=WELCOME_COOLDOWN, max_names=WELCOME_MAX_NAMES):
+        self.send_welcome = send_welcome
+        self.window = window
+        self.cooldown = cooldown
+        self.max_names = max_names
+        # chat_id -> _Names waiting for the window to close
+        self._pending = {}
+        # chat_id -> _LastWelcome, for chats welcomed within the cooldown
+        self._last = {}
+        self._tasks = set()
+
+    def add(self, bot, chat_id, names):
+        """Queue names (new members of chat_id) for the chat's next welcome"""
+        pending = self._pending.get(chat_id)
+        if pending is not None:
+            pending.extend(names)
+            return
+        self._pending[chat_id] = _Names(self.max_names, names)
+        task = asyncio.create_task(self._welcome_later(bot, chat_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _welcome_later(self, bot, chat_id):
+        await asyncio.sleep(self.window)
+        names = self._pending.pop(chat_id)
+        now = time.monotonic()
+        self._last = {
+            other_id: last for other_id, last in self._last.items() if now - last.sent_at < self.cooldown
+        }
+
+        replaces = None
+        last = self._last.get(chat_id)
+        if last is not None:
+            # Everyone the previous welcome greeted is still greeted, named or counted
+            names = _Names(self.max_names, list(last.names.recent) + list(names.recent), last.names.others + names.others)
+            replaces = last.message
+        message = await self.send_welcome(bot, chat_id, list(names.recent), names.others, replaces)
+        if message is not None:
+            self._last[chat_id] = _LastWelcome(now, message, names)
+        else:
+            self._last.pop(chat_id, None)